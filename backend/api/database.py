@@ -1,25 +1,47 @@
 import sys
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
 from pathlib import Path
 
 import psycopg2.extras
 
 try:
-    from common.db_config import create_threaded_connection_pool
+    from common.db_config import (
+        create_async_connection_pool,
+        create_threaded_connection_pool,
+    )
+    from common.settings import get_settings
 except ModuleNotFoundError:
     backend_root = Path(__file__).resolve().parents[1]
     if str(backend_root) not in sys.path:
         sys.path.append(str(backend_root))
-    from common.db_config import create_threaded_connection_pool
+    from common.db_config import (
+        create_async_connection_pool,
+        create_threaded_connection_pool,
+    )
+    from common.settings import get_settings
 
 
-# Initialize the pool using centralized runtime settings.
-db_pool = create_threaded_connection_pool()
+@lru_cache(maxsize=1)
+def get_db_pool():
+    """The process-wide connection pool, opened on first use.
+
+    Opening it lazily keeps importing this module free of connections, so
+    schedule worker processes, which never query, do not hold any.
+    """
+    return create_threaded_connection_pool()
+
+
+# Optional asyncio pool for catalog reads; opened and closed by the app lifespan.
+async_db_pool = (
+    create_async_connection_pool() if get_settings().db_async_enabled else None
+)
 
 
 # 2. Dependency Generator: Safely checks out and returns connections
 @contextmanager
 def get_db_connection():
+    db_pool = get_db_pool()
     conn = db_pool.getconn()
     try:
         # Return the connection as a dictionary, making it much easier to convert to JSON
@@ -28,3 +50,13 @@ def get_db_connection():
     finally:
         cursor.close()
         db_pool.putconn(conn)
+
+
+@asynccontextmanager
+async def get_async_db_connection():
+    """Async counterpart of get_db_connection yielding a dict-row cursor."""
+    from psycopg.rows import dict_row
+
+    async with async_db_pool.connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            yield cursor
@@ -1,17 +1,35 @@
-import re
-from typing import Dict, List, Optional, Sequence
+import base64
+import json
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from common.meeting_times import days_to_mask
 from common.settings import get_settings
+from common.upstream import Deadline
 from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.database import get_db_connection
+from api.cache import SingleFlight, TTLCache
+from api.database import (
+    async_db_pool,
+    get_async_db_connection,
+    get_db_connection,
+    get_db_pool,
+)
 from api.middleware import (
     APIBudgetMiddleware,
     InMemoryFixedWindowLimiter,
     ScheduleBodySizeGuardMiddleware,
 )
-from api.scheduler import build_schedules
+from api.scheduler import (
+    add_section_gpas,
+    build_schedules,
+    fetch_prof_ratings,
+    get_planetterp,
+    load_schedule_inputs,
+    upstream_deadline,
+)
 from api.schemas import (
     CourseDetail,
     CourseSummary,
@@ -22,8 +40,35 @@ from api.schemas import (
     Semester,
     StatusResponse,
 )
+from api.sections import (
+    ACTIVE_OR_LATEST_SEMESTER_SQL,
+    get_active_or_latest_semester_code,
+    get_semester_data_version,
+    load_sections_by_course,
+    normalize_instructor_names,
+)
+from api.snapshot import semester_snapshots
+from api.workers import (
+    ScheduleQueueFullError,
+    ScheduleWorkerCrashedError,
+    ScheduleWorkerPool,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the pool now so a bad database configuration fails startup.
+    get_db_pool()
+    if async_db_pool is not None:
+        await async_db_pool.open()
+    yield
+    if schedule_workers is not None:
+        await run_in_threadpool(schedule_workers.shutdown)
+    if async_db_pool is not None:
+        await async_db_pool.close()
 
-app = FastAPI(title="UMD API", version="0.0.1")
+
+app = FastAPI(title="UMD API", version="0.0.1", lifespan=lifespan)
 
 settings = get_settings()
 
@@ -39,6 +84,24 @@ schedule_limiter = InMemoryFixedWindowLimiter(
     burst=settings.api_rate_limit_schedules_burst,
 )
 
+# Generated schedules, keyed by normalized request and semester data version.
+schedule_cache = TTLCache(
+    max_entries=settings.api_schedule_cache_size,
+    ttl_seconds=settings.api_schedule_cache_ttl_seconds,
+)
+# Concurrent identical schedule requests wait on one computation.
+schedule_flights = SingleFlight()
+
+# Offload CPU-bound schedule generation to worker processes when configured.
+schedule_workers = (
+    ScheduleWorkerPool(
+        workers=settings.api_schedule_workers,
+        queue_depth=settings.api_schedule_queue_depth,
+    )
+    if settings.api_schedule_workers > 0
+    else None
+)
+
 
 app.add_middleware(
     ScheduleBodySizeGuardMiddleware,
@@ -59,45 +122,95 @@ app.add_middleware(
     allow_credentials=settings.cors_allow_credentials,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=[
+        "X-Schedule-Search-Truncated",
+        "X-Schedule-Search-Nodes",
+        "X-Schedule-Search-Explored",
+        "X-Schedule-Upstream-Degraded",
+        "X-Schedule-Cache",
+        "X-Next-Cursor",
+    ],
 )
 
 
-def _get_active_or_latest_semester_code(cursor) -> Optional[str]:
-    cursor.execute(
-        """
-        SELECT semester_code
-        FROM semesters
-        WHERE is_active = TRUE
-        ORDER BY semester_code DESC
-        LIMIT 1
-    """
-    )
-    row = cursor.fetchone()
-    if row:
-        return row["semester_code"]
-
-    cursor.execute(
-        """
-        SELECT semester_code
-        FROM semesters
-        ORDER BY semester_code DESC
-        LIMIT 1
-    """
-    )
-    row = cursor.fetchone()
-    return row["semester_code"] if row else None
-
-
 def _resolve_semester(cursor, semester: Optional[str]) -> str:
     if semester:
         return semester.strip()
 
-    resolved = _get_active_or_latest_semester_code(cursor)
+    resolved = get_active_or_latest_semester_code(cursor)
     if not resolved:
         raise HTTPException(status_code=404, detail="No semester data available")
     return resolved
 
 
+def _fetch_all_blocking(query: str, params: Optional[Sequence] = None) -> List[Dict]:
+    with get_db_connection() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+async def _fetch_all(query: str, params: Optional[Sequence] = None) -> List[Dict]:
+    """Run a read query on the async pool when enabled, else on the threadpool."""
+    if async_db_pool is None:
+        return await run_in_threadpool(_fetch_all_blocking, query, params)
+
+    async with get_async_db_connection() as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchall()
+
+
+async def _fetch_one(query: str, params: Optional[Sequence] = None) -> Optional[Dict]:
+    rows = await _fetch_all(query, params)
+    return rows[0] if rows else None
+
+
+async def _resolve_semester_async(semester: Optional[str]) -> str:
+    if semester:
+        return semester.strip()
+
+    row = await _fetch_one(ACTIVE_OR_LATEST_SEMESTER_SQL)
+    if not row:
+        raise HTTPException(status_code=404, detail="No semester data available")
+    return row["semester_code"]
+
+
+def _encode_page_cursor(*key: str) -> str:
+    """Opaque token for the sort key of the last row on a page."""
+    token = base64.urlsafe_b64encode(json.dumps(key).encode("utf-8"))
+    return token.decode("ascii").rstrip("=")
+
+
+def _decode_page_cursor(token: str, key_size: int) -> List[str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except ValueError:
+        key = None
+
+    if (
+        not isinstance(key, list)
+        or len(key) != key_size
+        or not all(isinstance(part, str) for part in key)
+    ):
+        raise HTTPException(status_code=422, detail="Invalid cursor.")
+    return key
+
+
+def _check_page_params(cursor: Optional[str], offset: int) -> None:
+    if cursor is not None and offset:
+        raise HTTPException(
+            status_code=422, detail="Use either cursor or offset, not both."
+        )
+
+
+async def _get_semester_snapshot(semester: Optional[str]):
+    # Only a due refresh polls Postgres; keep that off the event loop. The
+    # inline lookup never polls, even if a refresh falls due after the check.
+    if semester_snapshots.needs_refresh():
+        return await run_in_threadpool(semester_snapshots.get, semester)
+    return semester_snapshots.get(semester, refresh=False)
+
+
 def _normalize_course_codes(course_codes: Sequence[str]) -> List[str]:
     normalized = []
     seen = set()
@@ -110,95 +223,91 @@ def _normalize_course_codes(course_codes: Sequence[str]) -> List[str]:
     return normalized
 
 
-def _parse_min_credits(credits_value: Optional[str]) -> int:
-    if credits_value is None:
-        return 0
-
-    credits_text = str(credits_value).strip()
-    if not credits_text:
-        return 0
-
-    match = re.match(r"^(\d+)(?:\s*-\s*(\d+))?$", credits_text)
-    if not match:
-        return 0
-
-    first = int(match.group(1))
-    second = match.group(2)
-    if second is None:
-        return first
-    return min(first, int(second))
-
-
-def _get_course_min_credits_map(cursor, course_codes: Sequence[str]) -> Dict[str, int]:
-    if not course_codes:
-        return {}
-
-    cursor.execute(
-        """
-        SELECT course_code, credits
-        FROM courses
-        WHERE course_code = ANY(%s)
-    """,
-        (list(course_codes),),
+def _schedule_search_headers(search_stats: Dict) -> Dict[str, str]:
+    return {
+        "X-Schedule-Search-Truncated": str(search_stats["truncated"]).lower(),
+        "X-Schedule-Search-Nodes": str(search_stats["nodes_explored"]),
+        "X-Schedule-Search-Explored": str(search_stats["explored_fraction"]),
+        "X-Schedule-Upstream-Degraded": str(search_stats["upstream_degraded"]).lower(),
+    }
+
+
+def _schedule_cache_key(
+    payload: ScheduleRequest,
+    semester: str,
+    data_version: Optional[str],
+    required_courses: Sequence[str],
+    optional_courses: Sequence[str],
+    time_constraints: Sequence[Tuple[str, str, str]],
+) -> Tuple:
+    # Course order is kept because it decides ties between equally ranked
+    # schedules; professor exclusions and blocked windows are order-free.
+    return (
+        semester,
+        data_version,
+        tuple(required_courses),
+        tuple(optional_courses),
+        tuple(normalize_instructor_names(payload.excluded_profs)),
+        tuple(sorted(set(time_constraints))),
+        payload.max_schedules,
+        payload.max_credits,
+        payload.min_credits,
+        payload.only_open_seats,
     )
 
-    rows = cursor.fetchall()
-    return {row["course_code"]: _parse_min_credits(row.get("credits")) for row in rows}
-
 
 @app.get("/api/v1/status", response_model=StatusResponse)
-def get_status():
+async def get_status():
     """
     Returns freshness status based on the most recent section update timestamp.
     """
-    with get_db_connection() as cursor:
-        cursor.execute("SELECT MAX(last_updated) AS last_updated FROM sections")
-        row = cursor.fetchone()
-        return {"last_updated": row["last_updated"] if row else None}
+    row = await _fetch_one("SELECT MAX(last_updated) AS last_updated FROM sections")
+    return {
+        "last_updated": row["last_updated"] if row else None,
+        "schedule_cache": schedule_cache.stats(),
+        # Schedule workers never call PlanetTerp, so this breaker sees every call.
+        "planetterp_breaker": get_planetterp().client.breaker.stats(),
+    }
 
 
 @app.get("/api/v1/semesters", response_model=List[Semester])
-def get_semesters(active_only: bool = Query(default=False)):
+async def get_semesters(active_only: bool = Query(default=False)):
     """
     Returns available semesters, newest first.
     """
-    with get_db_connection() as cursor:
-        query = """
-            SELECT semester_code, name, is_active
-            FROM semesters
-        """
-        params = []
+    query = """
+        SELECT semester_code, name, is_active
+        FROM semesters
+    """
 
-        if active_only:
-            query += " WHERE is_active = TRUE"
+    if active_only:
+        query += " WHERE is_active = TRUE"
 
-        query += " ORDER BY semester_code DESC"
+    query += " ORDER BY semester_code DESC"
 
-        cursor.execute(query, params)
-        return cursor.fetchall()
+    return await _fetch_all(query)
 
 
 @app.get("/api/v1/departments", response_model=List[Department])
-def get_departments(response: Response):
+async def get_departments(response: Response):
     """
     Returns all department codes and names.
     """
     # Aggressive caching: departments rarely change.
     response.headers["Cache-Control"] = "public, max-age=86400"
 
-    with get_db_connection() as cursor:
-        cursor.execute(
-            """
-            SELECT department_code, name
-            FROM departments
-            ORDER BY department_code ASC
+    return await _fetch_all(
         """
-        )
-        return cursor.fetchall()
+        SELECT department_code, name
+        FROM departments
+        ORDER BY department_code ASC
+    """
+    )
 
 
 @app.get("/api/v1/courses", response_model=List[CourseSummary])
-def search_courses(
+async def search_courses(
+    response: Response,
     semester: Optional[str] = None,
     department: Optional[str] = None,
     credits: Optional[str] = None,
@@ -206,42 +315,98 @@ def search_courses(
     search: Optional[str] = None,
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None,
 ):
     """
     Course discovery endpoint (top-level course data only, no nested sections).
+
+    Pages are ordered by course code, or by relevance when ``search`` is set.
+    ``search`` matches the full-text index of course codes, titles and
+    descriptions, trigram-similar titles (typos), and title/description
+    substrings. When more rows follow, the X-Next-Cursor header holds a token
+    to pass back as ``cursor`` for the next page, which seeks past the
+    previous page instead of counting an offset.
     """
-    with get_db_connection() as cursor:
-        resolved_semester = _resolve_semester(cursor, semester)
-        where_clauses = [
+    _check_page_params(cursor, offset)
+    after_key = (
+        _decode_page_cursor(cursor, 2 if search else 1) if cursor is not None else None
+    )
+    after_rank = None
+    if after_key is not None and search:
+        try:
+            after_rank = float(after_key[0])
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail="Invalid cursor.") from exc
+
+    resolved_semester = await _resolve_semester_async(semester)
+    where_clauses = [
+        """
+        EXISTS (
+            SELECT 1
+            FROM sections s
+            WHERE s.course_code = c.course_code
+              AND s.semester_code = %s
+        )
+        """
+    ]
+    params = [resolved_semester]
+
+    if department:
+        where_clauses.append("c.department_code = %s")
+        params.append(department.upper().strip())
+
+    if credits is not None:
+        where_clauses.append("c.credits = %s")
+        params.append(str(credits))
+
+    if gened:
+        where_clauses.append("%s = ANY(c.gened_codes)")
+        params.append(gened.upper().strip())
+
+    rank_sql = "0::real"
+    rank_params = []
+    if search:
+        search_text = search.strip()
+        search_term = f"%{search_text}%"
+        where_clauses.append(
             """
-            EXISTS (
-                SELECT 1
-                FROM sections s
-                WHERE s.course_code = c.course_code
-                  AND s.semester_code = %s
+            (
+                c.search_vector @@ websearch_to_tsquery('english', %s)
+                OR c.title %% %s
+                OR c.title ILIKE %s
+                OR c.description ILIKE %s
             )
             """
-        ]
-        params = [resolved_semester]
-
-        if department:
-            where_clauses.append("c.department_code = %s")
-            params.append(department.upper().strip())
-
-        if credits is not None:
-            where_clauses.append("c.credits = %s")
-            params.append(str(credits))
-
-        if gened:
-            where_clauses.append("%s = ANY(c.gened_codes)")
-            params.append(gened.upper().strip())
-
-        if search:
-            where_clauses.append("(c.title ILIKE %s OR c.description ILIKE %s)")
-            search_term = f"%{search.strip()}%"
-            params.extend([search_term, search_term])
-
-        query = f"""
+        )
+        params.extend([search_text, search_text, search_term, search_term])
+        rank_sql = """
+            GREATEST(
+                ts_rank(c.search_vector, websearch_to_tsquery('english', %s)),
+                similarity(c.title, %s)
+            )
+        """
+        rank_params = [search_text, search_text]
+
+    keyset_sql = ""
+    keyset_params: List[Any] = []
+    if search:
+        order_sql = "search_rank DESC, course_code ASC"
+        if after_key is not None:
+            # search_rank is a real; compare against the cursor at that precision.
+            keyset_sql = (
+                "WHERE search_rank < %s::real"
+                " OR (search_rank = %s::real AND course_code > %s)"
+            )
+            keyset_params = [after_rank, after_rank, after_key[1]]
+    else:
+        order_sql = "course_code ASC"
+        if after_key is not None:
+            keyset_sql = "WHERE course_code > %s"
+            keyset_params = [after_key[0]]
+
+    query = f"""
+        SELECT *
+        FROM (
             SELECT
                 c.course_code,
                 c.department_code,
@@ -250,16 +415,29 @@ def search_courses(
                 c.description,
                 c.grading_options,
                 c.gened_codes,
-                c.attributes
+                c.attributes,
+                {rank_sql} AS search_rank
             FROM courses c
             WHERE {" AND ".join(where_clauses)}
-            ORDER BY c.course_code ASC
-            LIMIT %s OFFSET %s
-        """
+        ) matches
+        {keyset_sql}
+        ORDER BY {order_sql}
+        LIMIT %s OFFSET %s
+    """
 
-        params.extend([limit, offset])
-        cursor.execute(query, params)
-        return cursor.fetchall()
+    # One extra row tells whether there is a next page.
+    rows = await _fetch_all(
+        query, rank_params + params + keyset_params + [limit + 1, offset]
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = (
+            _encode_page_cursor(repr(last["search_rank"]), last["course_code"])
+            if search
+            else _encode_page_cursor(last["course_code"])
+        )
+    return rows
 
 
 @app.get("/api/v1/courses/{course_code}", response_model=CourseDetail)
@@ -270,6 +448,16 @@ def get_course(course_code: str, semester: Optional[str] = None):
     # Force uppercase for consistency (e.g., 'aaas100' -> 'AAAS100')
     course_code = course_code.upper()
 
+    snapshot = semester_snapshots.get(semester)
+    if snapshot is not None:
+        course_row = snapshot.courses.get(course_code)
+        if not course_row:
+            raise HTTPException(status_code=404, detail="Course not found")
+        return {
+            **course_row,
+            "sections": snapshot.sections_by_course.get(course_code, []),
+        }
+
     with get_db_connection() as cursor:
         resolved_semester = _resolve_semester(cursor, semester)
 
@@ -281,142 +469,164 @@ def get_course(course_code: str, semester: Optional[str] = None):
             # Best Practice: Return a proper 404 if it doesn't exist
             raise HTTPException(status_code=404, detail="Course not found")
 
-        # 2. Fetch the sections
-        cursor.execute(
-            """
-            SELECT id, section_code, instructors, total_seats, open_seats, waitlist 
-            FROM sections 
-            WHERE course_code = %s AND semester_code = %s
-        """,
-            (course_code, resolved_semester),
+        # 2. Fetch the sections and their meetings in one batch
+        sections_by_course = load_sections_by_course(
+            cursor, [course_code], resolved_semester
         )
-        sections = cursor.fetchall()
-
-        # 3. Fetch the meetings for those sections
-        for section in sections:
-            cursor.execute(
-                """
-                SELECT days, start_time, end_time, building_code, room, class_type 
-                FROM section_meetings 
-                WHERE section_id = %s
-            """,
-                (section["id"],),
-            )
-            section["meetings"] = cursor.fetchall()
 
         # Attach sections to the main course object
-        course_row["sections"] = sections
+        course_row["sections"] = sections_by_course[course_code]
 
         # FastAPI and Pydantic will automatically validate this dictionary
         # and convert it to perfect JSON
         return course_row
 
 
+async def _search_sections_in_db(
+    semester: Optional[str],
+    normalized_status: Optional[str],
+    instructor: Optional[str],
+    days: Optional[str],
+    limit: int,
+    offset: int,
+    after_key: Optional[List[str]],
+) -> List[Dict]:
+    resolved_semester = await _resolve_semester_async(semester)
+
+    where_clauses = ["ss.semester_code = %s"]
+    params: List[Any] = [resolved_semester]
+
+    if normalized_status == "open":
+        where_clauses.append("ss.open_seats > 0")
+    elif normalized_status == "closed":
+        where_clauses.append("ss.open_seats <= 0")
+
+    if instructor:
+        # Answered from the trigram index on section_instructors.
+        where_clauses.append(
+            """
+            ss.section_id IN (
+                SELECT si.section_id
+                FROM section_instructors si
+                WHERE si.instructor_key ILIKE %s
+            )
+            """
+        )
+        params.append(f"%{instructor.strip()}%")
+
+    day_mask = days_to_mask(days) if days else 0
+    if day_mask:
+        where_clauses.append(
+            """
+            EXISTS (
+                SELECT 1
+                FROM unnest(ss.day_masks) AS m
+                WHERE m & %s = %s
+            )
+            """
+        )
+        params.extend([day_mask, day_mask])
+    elif days:
+        where_clauses.append(
+            """
+            EXISTS (
+                SELECT 1
+                FROM unnest(ss.meeting_days) AS d
+                WHERE d ILIKE %s
+            )
+            """
+        )
+        params.append(f"%{days.strip()}%")
+
+    if after_key is not None:
+        where_clauses.append(
+            '(ss.course_code COLLATE "C", ss.section_code COLLATE "C") > (%s, %s)'
+        )
+        params.extend(after_key)
+
+    # section_search is the scraper-refreshed materialized view with each
+    # section's meetings already aggregated.
+    query = f"""
+        SELECT
+            ss.course_code,
+            ss.course_title,
+            ss.semester_code,
+            ss.section_code,
+            ss.instructors,
+            ss.total_seats,
+            ss.open_seats,
+            ss.waitlist,
+            ss.meetings
+        FROM section_search ss
+        WHERE {" AND ".join(where_clauses)}
+        ORDER BY ss.course_code COLLATE "C" ASC, ss.section_code COLLATE "C" ASC
+        LIMIT %s OFFSET %s
+    """
+
+    params.extend([limit, offset])
+    return await _fetch_all(query, params)
+
+
 @app.get("/api/v1/sections", response_model=List[SectionSearchResult])
-def search_sections(
+async def search_sections(
+    response: Response,
     semester: Optional[str] = None,
     status: Optional[str] = None,
     instructor: Optional[str] = None,
     days: Optional[str] = None,
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None,
 ):
     """
     Searches specific sections by availability/instructor/meeting-day constraints.
-    """
-    with get_db_connection() as cursor:
-        resolved_semester = _resolve_semester(cursor, semester)
-
-        where_clauses = ["s.semester_code = %s"]
-        params = [resolved_semester]
-
-        if status:
-            normalized_status = status.strip().lower()
-            if normalized_status == "open":
-                where_clauses.append("s.open_seats > 0")
-            elif normalized_status == "closed":
-                where_clauses.append("s.open_seats <= 0")
-            else:
-                raise HTTPException(
-                    status_code=422,
-                    detail="Invalid status. Use 'open' or 'closed'.",
-                )
-
-        if instructor:
-            where_clauses.append(
-                """
-                EXISTS (
-                    SELECT 1
-                    FROM unnest(s.instructors) AS i
-                    WHERE i ILIKE %s
-                )
-                """
-            )
-            params.append(f"%{instructor.strip()}%")
-
-        if days:
-            where_clauses.append(
-                """
-                EXISTS (
-                    SELECT 1
-                    FROM section_meetings sm2
-                    WHERE sm2.section_id = s.id
-                      AND sm2.days ILIKE %s
-                )
-                """
-            )
-            params.append(f"%{days.strip()}%")
 
-        query = f"""
-            SELECT
-                c.course_code,
-                c.title AS course_title,
-                s.semester_code,
-                s.section_code,
-                s.instructors,
-                s.total_seats,
-                s.open_seats,
-                s.waitlist,
-                COALESCE(
-                    json_agg(
-                        json_build_object(
-                            'days', sm.days,
-                            'start_time', sm.start_time,
-                            'end_time', sm.end_time,
-                            'building_code', sm.building_code,
-                            'room', sm.room,
-                            'class_type', sm.class_type
-                        )
-                    ) FILTER (WHERE sm.id IS NOT NULL),
-                    '[]'::json
-                ) AS meetings
-            FROM sections s
-            JOIN courses c ON c.course_code = s.course_code
-            LEFT JOIN section_meetings sm ON sm.section_id = s.id
-            WHERE {" AND ".join(where_clauses)}
-            GROUP BY
-                c.course_code,
-                c.title,
-                s.semester_code,
-                s.section_code,
-                s.instructors,
-                s.total_seats,
-                s.open_seats,
-                s.waitlist
-            ORDER BY c.course_code ASC, s.section_code ASC
-            LIMIT %s OFFSET %s
-        """
+    Pages are ordered by course and section code and use the same X-Next-Cursor
+    / ``cursor`` keyset pagination as the course search.
+    """
+    normalized_status = status.strip().lower() if status else None
+    if normalized_status not in (None, "open", "closed"):
+        raise HTTPException(
+            status_code=422,
+            detail="Invalid status. Use 'open' or 'closed'.",
+        )
+    _check_page_params(cursor, offset)
+    after_key = _decode_page_cursor(cursor, 2) if cursor is not None else None
+
+    snapshot = await _get_semester_snapshot(semester)
+    if snapshot is not None:
+        rows = snapshot.search_sections(
+            status=normalized_status,
+            instructor=instructor.strip() if instructor else None,
+            days=days.strip() if days else None,
+            limit=limit + 1,
+            offset=offset,
+            after=tuple(after_key) if after_key is not None else None,
+        )
+    else:
+        rows = await _search_sections_in_db(
+            semester, normalized_status, instructor, days, limit + 1, offset, after_key
+        )
 
-        params.extend([limit, offset])
-        cursor.execute(query, params)
-        return cursor.fetchall()
+    # One extra row tells whether there is a next page.
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_page_cursor(
+            rows[-1]["course_code"], rows[-1]["section_code"]
+        )
+    return rows
 
 
 @app.post("/api/v1/schedules", response_model=List[ScheduleResult])
-def generate_schedules(payload: ScheduleRequest):
+def generate_schedules(payload: ScheduleRequest, response: Response):
     """
     Builds conflict-free schedules for required courses in a semester,
     optionally filtering by excluded professors and blocked time windows.
+
+    The search runs under a node and wall-clock budget. When it is exhausted the
+    best schedules found so far are returned, and the X-Schedule-Search-*
+    headers report that the result was truncated and how much of the search
+    space was explored.
     """
     if not payload.required_courses:
         raise HTTPException(
@@ -448,17 +658,54 @@ def generate_schedules(payload: ScheduleRequest):
             detail="min_credits cannot be greater than max_credits.",
         )
 
-    with get_db_connection() as cursor:
-        resolved_semester = _resolve_semester(cursor, payload.semester)
+    parsed_time_constraints = [
+        (tc.day, tc.start_time, tc.end_time) for tc in payload.time_constraints
+    ]
+    all_courses = normalized_courses + normalized_optional
+
+    # Semester resolution and the cache lookup share one connection, or none
+    # when the snapshot covers the semester.
+    snapshot = semester_snapshots.get(payload.semester)
+    if snapshot is not None:
+        resolved_semester = snapshot.semester_code
+        data_version = snapshot.data_version
+    else:
+        with get_db_connection() as cursor:
+            resolved_semester = _resolve_semester(cursor, payload.semester)
+            data_version = get_semester_data_version(cursor, resolved_semester)
+
+    cache_key = _schedule_cache_key(
+        payload,
+        resolved_semester,
+        data_version,
+        normalized_courses,
+        normalized_optional,
+        parsed_time_constraints,
+    )
+    cached = schedule_cache.get(cache_key)
+    if cached is not None:
+        schedules, search_stats = cached
+        response.headers.update(_schedule_search_headers(search_stats))
+        response.headers["X-Schedule-Cache"] = "HIT"
+        return schedules
+
+    def _compute_schedules():
+        # Loading the inputs happens inside the flight, so concurrent
+        # duplicates share one section query as well as one search.
+        schedule_inputs = load_schedule_inputs(
+            all_courses,
+            resolved_semester,
+            excluded_profs=payload.excluded_profs,
+            time_constraints=parsed_time_constraints,
+            only_open_seats=payload.only_open_seats,
+        )
 
         if payload.max_credits is not None:
-            required_credits_by_course = _get_course_min_credits_map(
-                cursor, normalized_courses
-            )
+            _, course_min_credits = schedule_inputs
             missing_courses = [
                 course_code
                 for course_code in normalized_courses
-                if course_code not in required_credits_by_course
+                if course_code not in course_min_credits
             ]
             if missing_courses:
                 raise HTTPException(
@@ -467,7 +714,7 @@ def generate_schedules(payload: ScheduleRequest):
                 )
 
             total_required_credits = sum(
-                required_credits_by_course.get(course_code, 0)
+                course_min_credits.get(course_code, 0)
                 for course_code in normalized_courses
             )
             if total_required_credits > payload.max_credits:
@@ -479,18 +726,56 @@ def generate_schedules(payload: ScheduleRequest):
                     ),
                 )
 
-    parsed_time_constraints = [
-        (tc.day, tc.start_time, tc.end_time) for tc in payload.time_constraints
-    ]
-
-    return build_schedules(
-        required_courses=normalized_courses,
-        semester=resolved_semester,
-        excluded_profs=payload.excluded_profs,
-        time_constraints=parsed_time_constraints,
-        max_schedules=payload.max_schedules,
-        optional_courses=normalized_optional,
-        max_credits=payload.max_credits,
-        min_credits=payload.min_credits,
-        only_open_seats=payload.only_open_seats,
+        # PlanetTerp is only called from this process, whichever process runs
+        # the search, so the breaker and caches are shared by every request.
+        deadline = upstream_deadline()
+        prof_ratings, ratings_degraded = fetch_prof_ratings(
+            normalized_courses, schedule_inputs, payload.excluded_profs, deadline
+        )
+        upstream_budget = deadline.remaining()
+
+        schedule_kwargs: Dict[str, Any] = {
+            "required_courses": normalized_courses,
+            "semester": resolved_semester,
+            "excluded_profs": payload.excluded_profs,
+            "time_constraints": parsed_time_constraints,
+            "max_schedules": payload.max_schedules,
+            "optional_courses": normalized_optional,
+            "max_credits": payload.max_credits,
+            "min_credits": payload.min_credits,
+            "only_open_seats": payload.only_open_seats,
+            "max_search_nodes": settings.api_schedule_search_max_nodes,
+            "search_timeout_seconds": settings.api_schedule_search_timeout_ms / 1000,
+            "schedule_inputs": schedule_inputs,
+            "prof_ratings": prof_ratings,
+            "include_gpa": False,
+        }
+
+        if schedule_workers is None:
+            result = build_schedules(**schedule_kwargs)
+        else:
+            try:
+                result = schedule_workers.build_schedules(**schedule_kwargs)
+            except (ScheduleQueueFullError, ScheduleWorkerCrashedError) as exc:
+                raise HTTPException(
+                    status_code=503, detail=str(exc), headers={"Retry-After": "1"}
+                ) from exc
+
+        # The GPA lookups get whatever budget the rating lookups left over.
+        schedules, search_stats = result
+        grades_degraded = add_section_gpas(schedules, Deadline(upstream_budget))
+        search_stats["upstream_degraded"] = ratings_degraded or grades_degraded
+
+        # Truncated results depend on how busy the worker was, and degraded
+        # ones on PlanetTerp's health; only cache complete searches.
+        if not result[1]["truncated"] and not result[1]["upstream_degraded"]:
+            schedule_cache.set(cache_key, result)
+        return result
+
+    (schedules, search_stats), shared = schedule_flights.do(
+        cache_key, _compute_schedules
     )
+
+    response.headers.update(_schedule_search_headers(search_stats))
+    response.headers["X-Schedule-Cache"] = "SHARED" if shared else "MISS"
+    return schedules
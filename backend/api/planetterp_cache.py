@@ -0,0 +1,213 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from common.planetterp import GradeCounts, GradeKey, PlanetTerpClient
+from common.upstream import Deadline
+from psycopg2.extras import Json, execute_values
+
+from api.database import get_db_connection
+
+
+class PlanetTerpCache:
+    """PlanetTerp lookups cached in Postgres, with stale-while-revalidate.
+
+    Ratings live in ``planetterp_ratings`` and grade counts in
+    ``planetterp_grades``. Entries older than their TTL are still returned and
+    refreshed on a background thread, at most one refresh per entry at a time;
+    only entries that are missing are fetched while the caller waits. Failed
+    lookups are never cached. ``fetch`` has the same contract as
+    ``PlanetTerpClient.fetch``; its ``deadline`` only bounds the wait for
+    missing entries, so cached ones are returned even when it has passed.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: PlanetTerpClient,
+        rating_ttl_seconds: int,
+        grades_ttl_seconds: int,
+    ):
+        self.client = client
+        self.rating_ttl_seconds = rating_ttl_seconds
+        self.grades_ttl_seconds = grades_ttl_seconds
+        self._refreshing: Set[Tuple] = set()
+        self._lock = Lock()
+        self._refresher = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="planetterp-refresh"
+        )
+
+    def fetch(
+        self,
+        professors: Iterable[str],
+        grade_keys: Iterable[GradeKey],
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[Dict[str, float], Dict[GradeKey, Optional[GradeCounts]]]:
+        professors = list(dict.fromkeys(professors))
+        grade_keys = list(dict.fromkeys(grade_keys))
+
+        with get_db_connection() as cursor:
+            ratings, stale_professors = self._read_ratings(cursor, professors)
+            grades, stale_keys = self._read_grades(cursor, grade_keys)
+
+        missing_professors = [p for p in professors if p not in ratings]
+        missing_keys = [key for key in grade_keys if key not in grades]
+        if missing_professors or missing_keys:
+            fetched_ratings, fetched_grades = self.client.fetch(
+                missing_professors, missing_keys, deadline
+            )
+            self._store(fetched_ratings, fetched_grades)
+            ratings.update(fetched_ratings)
+            grades.update(fetched_grades)
+
+        self._refresh_in_background(stale_professors, stale_keys)
+        return ratings, grades
+
+    def _read_ratings(
+        self, cursor, professors: Sequence[str]
+    ) -> Tuple[Dict[str, float], List[str]]:
+        if not professors:
+            return {}, []
+
+        cursor.execute(
+            """
+            SELECT
+                professor,
+                average_rating,
+                fetched_at < CURRENT_TIMESTAMP - make_interval(secs => %s) AS stale
+            FROM planetterp_ratings
+            WHERE professor = ANY(%s)
+        """,
+            (self.rating_ttl_seconds, list(professors)),
+        )
+        ratings = {}
+        stale = []
+        for row in cursor.fetchall():
+            ratings[row["professor"]] = row["average_rating"]
+            if row["stale"]:
+                stale.append(row["professor"])
+        return ratings, stale
+
+    def _read_grades(
+        self, cursor, grade_keys: Sequence[GradeKey]
+    ) -> Tuple[Dict[GradeKey, Optional[GradeCounts]], List[GradeKey]]:
+        if not grade_keys:
+            return {}, []
+
+        cursor.execute(
+            """
+            SELECT
+                g.professor,
+                g.course_code,
+                g.grade_counts,
+                g.fetched_at < CURRENT_TIMESTAMP - make_interval(secs => %s) AS stale
+            FROM planetterp_grades g
+            JOIN unnest(%s::text[], %s::text[]) AS k(professor, course_code)
+                ON g.professor = k.professor AND g.course_code = k.course_code
+        """,
+            (
+                self.grades_ttl_seconds,
+                [professor for professor, _ in grade_keys],
+                [course_code for _, course_code in grade_keys],
+            ),
+        )
+        grades: Dict[GradeKey, Optional[GradeCounts]] = {}
+        stale = []
+        for row in cursor.fetchall():
+            key = (row["professor"], row["course_code"])
+            grades[key] = row["grade_counts"]
+            if row["stale"]:
+                stale.append(key)
+        return grades, stale
+
+    def _store(
+        self,
+        ratings: Dict[str, float],
+        grades: Dict[GradeKey, Optional[GradeCounts]],
+    ) -> None:
+        """Best-effort write; failures are logged, never raised.
+
+        Rows are written in key order so concurrent upserts of overlapping
+        batches lock them in the same order and cannot deadlock.
+        """
+        if not ratings and not grades:
+            return
+
+        try:
+            self._write(ratings, grades)
+        except Exception as e:
+            print(f"Error storing PlanetTerp cache entries: {e}")
+
+    def _write(
+        self,
+        ratings: Dict[str, float],
+        grades: Dict[GradeKey, Optional[GradeCounts]],
+    ) -> None:
+        with get_db_connection() as cursor:
+            if ratings:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO planetterp_ratings (professor, average_rating)
+                    VALUES %s
+                    ON CONFLICT (professor) DO UPDATE SET
+                        average_rating = EXCLUDED.average_rating,
+                        fetched_at = CURRENT_TIMESTAMP
+                    """,
+                    sorted(ratings.items()),
+                )
+            if grades:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO planetterp_grades (professor, course_code, grade_counts)
+                    VALUES %s
+                    ON CONFLICT (professor, course_code) DO UPDATE SET
+                        grade_counts = EXCLUDED.grade_counts,
+                        fetched_at = CURRENT_TIMESTAMP
+                    """,
+                    [
+                        (
+                            professor,
+                            course_code,
+                            Json(counts) if counts is not None else None,
+                        )
+                        for (professor, course_code), counts in sorted(
+                            grades.items(), key=lambda item: item[0]
+                        )
+                    ],
+                )
+            cursor.connection.commit()
+
+    def _refresh_in_background(
+        self, professors: Sequence[str], grade_keys: Sequence[GradeKey]
+    ) -> None:
+        with self._lock:
+            professors = [
+                p for p in professors if ("rating", p) not in self._refreshing
+            ]
+            grade_keys = [
+                key for key in grade_keys if ("grades", key) not in self._refreshing
+            ]
+            claimed = {("rating", p) for p in professors} | {
+                ("grades", key) for key in grade_keys
+            }
+            if not claimed:
+                return
+            self._refreshing |= claimed
+
+        self._refresher.submit(self._refresh, professors, grade_keys, claimed)
+
+    def _refresh(
+        self,
+        professors: Sequence[str],
+        grade_keys: Sequence[GradeKey],
+        claimed: Set[Tuple],
+    ) -> None:
+        try:
+            self._store(*self.client.fetch(professors, grade_keys))
+        except Exception as e:
+            print(f"Error refreshing PlanetTerp cache: {e}")
+        finally:
+            with self._lock:
+                self._refreshing -= claimed
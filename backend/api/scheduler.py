@@ -1,146 +1,124 @@
+import heapq
+import itertools
 import re
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
-
-import requests
+import time
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from common.meeting_times import (
+    DAY_TOKEN_BITS,
+    meeting_block,
+    normalize_day_token,
+    parse_time_to_minutes,
+)
+from common.planetterp import PlanetTerpClient
+from common.settings import get_settings
+from common.upstream import CircuitBreaker, Deadline
 
 from api.database import get_db_connection
+from api.planetterp_cache import PlanetTerpCache
+from api.sections import load_course_offerings
+from api.snapshot import semester_snapshots
 
-P_TERP_PROF_URL = "https://planetterp.com/api/v1/professor"
-P_TERP_PROF_GRADES_CLASS_URL = "https://planetterp.com/api/v1/grades"
+# (sections_by_course, min_credits_by_course), see load_schedule_inputs.
+ScheduleInputs = Tuple[Dict[str, List[Dict]], Dict[str, int]]
 
 
-def _parse_time_to_minutes(t: str):
-    """Parse 12h (with am/pm) or 24h time string to minutes since midnight.
-    Returns None on parse failure or empty input.
-    Examples accepted: '10:00am', '10:00 am', '12:50pm', '13:00', '09:05'
-    """
-    if not t:
-        return None
-    s = t.strip().lower().replace(".", "")
-    # remove interior space before am/pm if present
-    if s.endswith(" am") or s.endswith(" pm"):
-        s = s.replace(" ", "")
-    try:
-        if s.endswith("am") or s.endswith("pm"):
-            dt = datetime.strptime(s, "%I:%M%p")
-        else:
-            dt = datetime.strptime(s, "%H:%M")
-        return dt.hour * 60 + dt.minute
-    except Exception:
-        return None
-
-
-def _normalize_day_token(day: str) -> Optional[str]:
-    if not day:
-        return None
-
-    normalized = day.strip().lower()
-    mapping = {
-        "m": "M",
-        "mon": "M",
-        "monday": "M",
-        "t": "T",
-        "tu": "T",
-        "tue": "T",
-        "tues": "T",
-        "tuesday": "T",
-        "w": "W",
-        "wed": "W",
-        "wednesday": "W",
-        "r": "R",
-        "th": "R",
-        "thu": "R",
-        "thur": "R",
-        "thurs": "R",
-        "thursday": "R",
-        "f": "F",
-        "fri": "F",
-        "friday": "F",
-        "s": "S",
-        "sat": "S",
-        "saturday": "S",
-        "u": "U",
-        "sun": "U",
-        "sunday": "U",
-    }
-    return mapping.get(normalized)
+@lru_cache(maxsize=1)
+def get_planetterp() -> PlanetTerpCache:
+    """The process-wide PlanetTerp cache, client and circuit breaker.
 
+    Built on first use so schedule worker processes, which only run the
+    search, never create one.
+    """
+    settings = get_settings()
+    return PlanetTerpCache(
+        client=PlanetTerpClient(
+            timeout_seconds=settings.planetterp_timeout_ms / 1000,
+            max_concurrency=settings.planetterp_max_concurrency,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.planetterp_breaker_failure_threshold,
+                reset_seconds=settings.planetterp_breaker_reset_seconds,
+            ),
+        ),
+        rating_ttl_seconds=settings.planetterp_rating_ttl_seconds,
+        grades_ttl_seconds=settings.planetterp_grades_ttl_seconds,
+    )
 
-def _parse_days_to_tokens(days: str) -> Set[str]:
-    if not days:
-        return set()
-
-    s = days.strip().lower().replace(" ", "")
-    tokens = []
-    i = 0
-    while i < len(s):
-        if s.startswith("th", i):
-            tokens.append("R")
-            i += 2
-            continue
-        if s.startswith("tu", i):
-            tokens.append("T")
-            i += 2
-            continue
-        if s.startswith("su", i):
-            tokens.append("U")
-            i += 2
-            continue
-        if s.startswith("sa", i):
-            tokens.append("S")
-            i += 2
-            continue
-
-        mapped = _normalize_day_token(s[i])
-        if mapped:
-            tokens.append(mapped)
-        i += 1
 
-    return set(tokens)
+# (day_mask, start_minute, end_minute) for one scheduled meeting block.
+CompiledMeeting = Tuple[int, int, int]
 
 
-def time_overlap(start_db, end_db, start_24, end_24):
-    """Return True if class times overlap, False otherwise."""
-    s1 = _parse_time_to_minutes(start_db)
-    e1 = _parse_time_to_minutes(end_db)
-    s2 = _parse_time_to_minutes(start_24)
-    e2 = _parse_time_to_minutes(end_24)
-    # compare start/end times
-    if s1 is None or e1 is None or s2 is None or e2 is None:
-        raise ValueError("Invalid time format provided.")
+def _minutes_overlap(s1: int, e1: int, s2: int, e2: int) -> bool:
     if s1 == s2:
         return True
     if s1 < s2:
         return e1 > s2
-    else:
-        return e2 > s1
-
-
-def _get_course_sections_from_db(cursor, course_code: str, semester: str) -> List[Dict]:
-    cursor.execute(
-        """
-        SELECT id, section_code, instructors, total_seats, open_seats, waitlist
-        FROM sections
-        WHERE course_code = %s AND semester_code = %s
-        ORDER BY section_code ASC
-    """,
-        (course_code, semester),
-    )
-    sections = cursor.fetchall()
+    return e2 > s1
 
-    for section in sections:
-        cursor.execute(
-            """
-            SELECT days, start_time, end_time, building_code, room, class_type
-            FROM section_meetings
-            WHERE section_id = %s
-        """,
-            (section["id"],),
+
+def _compile_meetings(meetings: Sequence[Dict]) -> Tuple[CompiledMeeting, ...]:
+    """Parse meeting rows once into (day_mask, start, end) integer triples.
+
+    Meetings without days or times (online/TBA blocks) never conflict, so they
+    are dropped here instead of being skipped on every comparison.
+    """
+    compiled = []
+    for meeting in meetings:
+        block = meeting_block(
+            meeting.get("days"), meeting.get("start_time"), meeting.get("end_time")
         )
-        section["meetings"] = cursor.fetchall()
+        if block is not None:
+            compiled.append(block)
+    return tuple(compiled)
+
+
+def _compile_time_constraints(
+    time_constraints: Optional[Sequence[Tuple[str, str, str]]],
+) -> List[CompiledMeeting]:
+    compiled = []
+    for tc_day, tc_start, tc_end in time_constraints or []:
+        normalized_day = normalize_day_token(tc_day)
+        if normalized_day is None:
+            continue
+
+        start = parse_time_to_minutes(tc_start)
+        end = parse_time_to_minutes(tc_end)
+        if start is None or end is None:
+            raise ValueError("Invalid time format provided.")
+
+        compiled.append((DAY_TOKEN_BITS[normalized_day], start, end))
+    return compiled
+
+
+def _section_meetings(section: Dict) -> Tuple[CompiledMeeting, ...]:
+    compiled = section.get("compiled_meetings")
+    if compiled is None:
+        compiled = _compile_meetings(section.get("meetings", []))
+        section["compiled_meetings"] = compiled
+    return compiled
+
 
-    return sections
+def _compiled_meetings_conflict(
+    meetings_a: Sequence[CompiledMeeting], meetings_b: Sequence[CompiledMeeting]
+) -> bool:
+    for days1, start1, end1 in meetings_a:
+        for days2, start2, end2 in meetings_b:
+            if days1 & days2 and _minutes_overlap(start1, end1, start2, end2):
+                return True
+    return False
 
 
 def _parse_min_credits(credits_value: Optional[str]) -> int:
@@ -162,105 +140,163 @@ def _parse_min_credits(credits_value: Optional[str]) -> int:
     return min(first, int(second))
 
 
-def _get_course_min_credits_map(course_codes: Sequence[str]) -> Dict[str, int]:
-    if not course_codes:
-        return {}
+def load_schedule_inputs(
+    course_codes: Sequence[str],
+    semester: str,
+    excluded_profs: Optional[Sequence[str]] = None,
+    time_constraints: Optional[Sequence[Tuple[str, str, str]]] = None,
+    only_open_seats: bool = False,
+) -> ScheduleInputs:
+    """Return ``(sections_by_course, min_credits_by_course)`` for ``course_codes``.
+
+    Only sections the schedule search can use are returned: freshman
+    connection (FC) sections, sections taught by any of ``excluded_profs``,
+    sections meeting during any of the blocked ``time_constraints`` and, if
+    ``only_open_seats``, full sections are left out. Served from the semester
+    snapshot when it covers ``semester``. Otherwise everything is loaded and
+    filtered in one query. Courses missing from the catalog have no credits
+    entry.
+    """
+    excluded_profs = excluded_profs or []
+    blocked_windows = _compile_time_constraints(time_constraints)
+    snapshot = semester_snapshots.get(semester)
+    if snapshot is not None:
+        excluded_ids = snapshot.section_ids_taught_by(excluded_profs)
+
+        def _is_candidate(section: Dict) -> bool:
+            # Same filters as load_course_offerings.
+            if "FC" in section.get("section_code", ""):
+                return False
+            if only_open_seats and section.get("open_seats", 0) < 1:
+                return False
+            if section["id"] in excluded_ids:
+                return False
+            return not _compiled_meetings_conflict(
+                _section_meetings(section), blocked_windows
+            )
 
-    with get_db_connection() as cursor:
-        cursor.execute(
-            """
-            SELECT course_code, credits
-            FROM courses
-            WHERE course_code = ANY(%s)
-        """,
-            (list(course_codes),),
-        )
-        rows = cursor.fetchall()
+        # Snapshot sections are shared across requests; the search annotates
+        # its own shallow copies.
+        sections_by_course = {
+            course_code: [
+                dict(section)
+                for section in snapshot.sections_by_course.get(course_code, [])
+                if _is_candidate(section)
+            ]
+            for course_code in course_codes
+        }
+        credits_by_course = {
+            course_code: snapshot.courses[course_code].get("credits")
+            for course_code in course_codes
+            if course_code in snapshot.courses
+        }
+    else:
+        with get_db_connection() as cursor:
+            sections_by_course, credits_by_course = load_course_offerings(
+                cursor,
+                course_codes,
+                semester,
+                excluded_profs,
+                blocked_windows,
+                only_open_seats,
+            )
+        # Sections with meetings the query could not check come back without
+        # compiled_meetings; check them against the meeting text instead.
+        sections_by_course = {
+            course_code: [
+                section
+                for section in sections
+                if section["compiled_meetings"] is not None
+                or not _compiled_meetings_conflict(
+                    _section_meetings(section), blocked_windows
+                )
+            ]
+            for course_code, sections in sections_by_course.items()
+        }
 
-    return {row["course_code"]: _parse_min_credits(row.get("credits")) for row in rows}
+    return sections_by_course, {
+        course_code: _parse_min_credits(credits)
+        for course_code, credits in credits_by_course.items()
+    }
 
 
 def _sections_conflict(section_a: Dict, section_b: Dict) -> bool:
-    for time1 in section_a.get("meetings", []):
-        days1 = _parse_days_to_tokens(time1.get("days", ""))
-        if not days1:
-            continue
+    return _compiled_meetings_conflict(
+        _section_meetings(section_a), _section_meetings(section_b)
+    )
 
-        start1 = time1.get("start_time", "")
-        end1 = time1.get("end_time", "")
-        if not start1 or not end1:
-            continue
 
-        for time2 in section_b.get("meetings", []):
-            days2 = _parse_days_to_tokens(time2.get("days", ""))
-            if not days2:
-                continue
+def _build_conflict_bitsets(domains: Dict[str, List[Dict]]) -> List[int]:
+    """Precompute pairwise conflicts between every candidate section.
 
-            start2 = time2.get("start_time", "")
-            end2 = time2.get("end_time", "")
-            if not start2 or not end2:
+    Each section is tagged with a dense ``candidate_index``; bit ``j`` of
+    ``conflicts[i]`` is set when candidates ``i`` and ``j`` overlap in time.
+    Sections of the same course are never scheduled together, so they are not
+    compared.
+    """
+    candidates: List[Tuple[str, Dict]] = []
+    for course_code, domain in domains.items():
+        for section in domain:
+            section["candidate_index"] = len(candidates)
+            candidates.append((course_code, section))
+
+    day_masks = []
+    for _, section in candidates:
+        day_mask = 0
+        for days, _, _ in _section_meetings(section):
+            day_mask |= days
+        day_masks.append(day_mask)
+
+    conflicts = [0] * len(candidates)
+    for i, (course_a, section_a) in enumerate(candidates):
+        for j in range(i + 1, len(candidates)):
+            course_b, section_b = candidates[j]
+            if course_a == course_b or not day_masks[i] & day_masks[j]:
                 continue
+            if _sections_conflict(section_a, section_b):
+                conflicts[i] |= 1 << j
+                conflicts[j] |= 1 << i
+    return conflicts
 
-            if days1.intersection(days2) and time_overlap(start1, end1, start2, end2):
-                return True
-    return False
 
+def _group_equivalent_sections(sections: List[Dict]) -> List[Dict]:
+    """Collapse sections that are interchangeable for scheduling purposes.
 
-def _schedule_signature(schedule: Dict[str, Dict]) -> Tuple[Tuple[str, str], ...]:
-    return tuple(
-        sorted(
-            (course_code, str(section.get("section_code", "")))
-            for course_code, section in schedule.items()
+    Sections with the same meeting blocks and the same instructors conflict
+    with exactly the same things and score identically, so only the first one
+    of each group is searched. Every section records its ``domain_position``
+    in the filtered list, and each representative keeps all of its group
+    (itself included) in ``equivalent_sections`` for expansion at the end.
+    """
+    representatives: Dict[Tuple, Dict] = {}
+    for position, section in enumerate(sections):
+        section["domain_position"] = position
+        class_key = (
+            tuple(sorted(_section_meetings(section))),
+            tuple(section.get("instructors") or []),
         )
-    )
-
-
-def _expand_schedule_with_optional_courses(
-    base_schedule: Dict[str, Dict],
-    optional_course_codes: Sequence[str],
-    optional_domains: Dict[str, List[Dict]],
-    course_min_credits: Dict[str, int],
-    max_credits: Optional[int],
-) -> List[Dict[str, Dict]]:
-    base = dict(base_schedule)
-    base_credits = sum(course_min_credits.get(course_code, 0) for course_code in base)
-
-    if max_credits is not None and base_credits > max_credits:
-        return []
-
-    expanded: List[Dict[str, Dict]] = []
-
-    def _dfs_optional(idx: int, current: Dict[str, Dict], current_credits: int):
-        if idx >= len(optional_course_codes):
-            expanded.append(current.copy())
-            return
-
-        course_code = optional_course_codes[idx]
-        sections = optional_domains.get(course_code, [])
-
-        # Option 1: skip this optional course.
-        _dfs_optional(idx + 1, current, current_credits)
-
-        # Option 2: include one viable section from this optional course.
-        course_credits = course_min_credits.get(course_code, 0)
-        for section in sections:
-            if (
-                max_credits is not None
-                and current_credits + course_credits > max_credits
-            ):
-                continue
+        representative = representatives.get(class_key)
+        if representative is None:
+            section["equivalent_sections"] = [section]
+            representatives[class_key] = section
+        else:
+            representative["equivalent_sections"].append(section)
+    return list(representatives.values())
 
-            if any(
-                _sections_conflict(section, existing) for existing in current.values()
-            ):
-                continue
 
-            current[course_code] = section
-            _dfs_optional(idx + 1, current, current_credits + course_credits)
-            del current[course_code]
+def _average_professor_rating(
+    sections: Iterable[Dict], prof_ratings: Dict[str, float]
+) -> float:
+    total_rating = 0.0
+    total_instructors = 0
+    for section in sections:
+        for instructor in section.get("instructors", []):
+            total_rating += prof_ratings.get(instructor, 0)
+            total_instructors += 1
 
-    _dfs_optional(0, base, base_credits)
-    return expanded
+    if total_instructors == 0:
+        return 0.0
+    return round(total_rating / total_instructors, 2)
 
 
 def preprocess_restrictions(
@@ -269,223 +305,266 @@ def preprocess_restrictions(
     time_constraints,
     semester,
     only_open_seats: bool = True,
+    sections_by_course: Optional[Dict[str, List[Dict]]] = None,
 ):
+    """Return the courses and their viable, equivalence-grouped sections.
+
+    Every domain filter (FC sections, excluded professors, blocked time
+    windows, open seats) is applied while loading, in SQL when reading
+    Postgres, so a caller passing ``sections_by_course`` must have loaded it
+    through ``load_schedule_inputs`` with the same arguments.
+    """
     VARIABLES = required_courses
     DOMAINS = {}
-    excluded_set = {p.strip().lower() for p in (excluded_profs or []) if p.strip()}
-
-    with get_db_connection() as cursor:
-        for course_code in required_courses:
-            sections = _get_course_sections_from_db(cursor, course_code, semester)
-
-            filtered_sections = []
-
-            for section in sections:
-                if "FC" in section.get("section_code", ""):
-                    continue  # TODO: handle freshman connection sections specially later, must be all FC or no FC
-                # excluded professors
-                section_instructors = section.get("instructors", [])
-                if excluded_set and any(
-                    prof and prof.strip().lower() in excluded_set
-                    for prof in section_instructors
-                ):
-                    continue
-
-                # time constraints
-                if time_constraints:
-                    conflict = False
-                    for section_time in section.get("meetings", []):
-                        days = _parse_days_to_tokens(section_time.get("days", ""))
-                        start_time = section_time.get("start_time")
-                        end_time = section_time.get("end_time")
-                        if not days or not start_time or not end_time:
-                            continue
-
-                        for tc_day, tc_start, tc_end in time_constraints:
-                            normalized_day = _normalize_day_token(tc_day)
-                            if normalized_day is None:
-                                continue
-
-                            # mark conflict if the section occurs on the constrained day
-                            # and its time overlaps the restricted interval at all
-                            if normalized_day in days and time_overlap(
-                                start_time, end_time, tc_start, tc_end
-                            ):
-                                conflict = True
-                                break
-                        if conflict:
-                            break
-                    if conflict:
-                        continue
-                # if requested, only include sections with at least one open seat
-                if only_open_seats and section.get("open_seats", 0) < 1:
-                    continue
-
-                filtered_sections.append(section)
-
-            DOMAINS[course_code] = filtered_sections
+
+    if sections_by_course is None:
+        sections_by_course, _ = load_schedule_inputs(
+            required_courses,
+            semester,
+            excluded_profs=excluded_profs,
+            time_constraints=time_constraints,
+            only_open_seats=only_open_seats,
+        )
+
+    for course_code in required_courses:
+        DOMAINS[course_code] = _group_equivalent_sections(
+            list(sections_by_course[course_code])
+        )
     return VARIABLES, DOMAINS
 
 
-def backtrack_schedules(variables, domains, assignment=None):
-    if assignment is None:
-        assignment = {}
-
-    if len(assignment) == len(variables):
-        return [assignment.copy()]
-
-    unassigned_vars = [v for v in variables if v not in assignment]
-    first_var = unassigned_vars[0]
-    schedules = []
-
-    for value in domains[first_var]:
-        # Check if this new section conflicts with existing assignments
-        conflict = False
-        for assigned_var in assignment:
-            assigned_section = assignment[assigned_var]
-            # check time conflicts between value and assigned_section
-            for time1 in value.get("meetings", []):
-                days1 = _parse_days_to_tokens(time1.get("days", ""))
-                if days1 == set():
-                    continue
-                start1 = time1.get("start_time", "")
-                if not start1:
-                    continue
-                end1 = time1.get("end_time", "")
-                if not end1:
-                    continue
-                for time2 in assigned_section.get("meetings", []):
-                    days2 = _parse_days_to_tokens(time2.get("days", ""))
-                    if days2 == set():
-                        continue
-                    start2 = time2.get("start_time", "")
-                    if not start2:
-                        continue
-                    end2 = time2.get("end_time", "")
-                    if not end2:
-                        continue
-                    # check if days overlap and times overlap
-                    if days1.intersection(days2):
-                        if time_overlap(start1, end1, start2, end2):
-                            conflict = True
-                            break
-                if conflict:
-                    break
-            if conflict:
-                break
+def search_schedules(
+    required_courses: Sequence[str],
+    optional_courses: Sequence[str],
+    domains: Dict[str, List[Dict]],
+    conflicts: List[int],
+    course_min_credits: Dict[str, int],
+    max_credits: Optional[int] = None,
+    can_improve: Optional[Callable[[Dict[str, Dict], Set[str], int], bool]] = None,
+    max_nodes: Optional[int] = None,
+    deadline: Optional[float] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Dict]]:
+    """Enumerate conflict-free schedules as a constraint satisfaction problem.
+
+    Every course is a variable whose values are its candidate sections, and
+    optional courses can also be skipped. Required courses are decided first,
+    then optional ones, each time branching on the course with the fewest
+    live sections left (minimum remaining values). ``blocked`` is the union of
+    the conflict bitsets of the assigned sections, so forward checking is one
+    mask per course: a branch fails as soon as a required course has no live
+    section, and optional courses with none left (or that would exceed
+    ``max_credits``) are skipped without branching.
+
+    The same working dict is yielded for every complete schedule, in search
+    order rather than course order; callers must copy it if they keep it.
+    ``can_improve(assignment, skipped, blocked)`` is an optional
+    branch-and-bound hook: when it returns False, no completion of the current
+    partial assignment can make the results, and the subtree is abandoned.
+
+    The search stops early once it has visited ``max_nodes`` nodes or the
+    ``time.monotonic()`` ``deadline`` has passed. ``stats``, when given, is
+    filled with ``nodes_explored``, ``truncated`` and ``explored_fraction``:
+    each node's share of the search space is split evenly between its
+    branches, and the shares of finished or pruned subtrees are summed.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(nodes_explored=0, truncated=False, explored_fraction=0.0)
+
+    domain_masks: Dict[str, int] = {}
+    for course_code in [*required_courses, *optional_courses]:
+        domain_mask = 0
+        for section in domains.get(course_code, []):
+            domain_mask |= 1 << section["candidate_index"]
+        domain_masks[course_code] = domain_mask
+
+    assignment: Dict[str, Dict] = {}
+    skipped: Set[str] = set()
+
+    def _assign(
+        course_code: str,
+        live: int,
+        pending_required: List[str],
+        pending_optional: List[str],
+        blocked: int,
+        credits: int,
+        share: float,
+    ) -> Iterator[Dict[str, Dict]]:
+        course_credits = course_min_credits.get(course_code, 0)
+        for section in domains[course_code]:
+            index = section["candidate_index"]
+            if not live >> index & 1:
+                continue
 
-        if conflict:
-            continue  # skip this value, try next section
-
-        # No conflict, assign and recurse
-        assignment[first_var] = value
-        result = backtrack_schedules(variables, domains, assignment)
-        schedules.extend(result)
-        del assignment[first_var]
-
-    # Deduplicate schedules
-    seen = set()
-    unique_schedules = []
-    for sched in schedules:
-        sched_tuple = tuple(
-            (course, section["section_code"]) for course, section in sched.items()
-        )
-        if sched_tuple not in seen:
-            seen.add(sched_tuple)
-            unique_schedules.append(sched)
-    return unique_schedules
-
-
-def get_prof_ratings(professors, excluded_profs):
-    needed_profs = set(professors) - set(excluded_profs or [])
-    prof_ratings = {}
-    for prof in needed_profs:
-        try:
-            response = requests.get(
-                P_TERP_PROF_URL + f"?name={prof.replace(' ', '%20')}",
+            assignment[course_code] = section
+            yield from _search(
+                pending_required,
+                pending_optional,
+                blocked | conflicts[index],
+                credits + course_credits,
+                share,
+            )
+            del assignment[course_code]
+
+    def _search(
+        pending_required: List[str],
+        pending_optional: List[str],
+        blocked: int,
+        credits: int,
+        share: float,
+    ) -> Iterator[Dict[str, Dict]]:
+        if stats["truncated"]:
+            return
+        if (max_nodes is not None and stats["nodes_explored"] >= max_nodes) or (
+            deadline is not None and time.monotonic() >= deadline
+        ):
+            stats["truncated"] = True
+            return
+        stats["nodes_explored"] += 1
+
+        if (max_credits is not None and credits > max_credits) or (
+            can_improve is not None and not can_improve(assignment, skipped, blocked)
+        ):
+            stats["explored_fraction"] += share
+            return
+
+        if pending_required:
+            live_required: List[Tuple[str, int]] = []
+            for course_code in pending_required:
+                live = domain_masks[course_code] & ~blocked
+                if not live:
+                    # Forward check: this required course can no longer fit.
+                    stats["explored_fraction"] += share
+                    return
+                live_required.append((course_code, live))
+
+            chosen_course, chosen_live = min(
+                live_required, key=lambda item: item[1].bit_count()
+            )
+            yield from _assign(
+                chosen_course,
+                chosen_live,
+                [c for c in pending_required if c != chosen_course],
+                pending_optional,
+                blocked,
+                credits,
+                share / chosen_live.bit_count(),
             )
-            data = response.json()
-            if "error" in data:
-                prof_ratings[prof] = 0
-            elif data["average_rating"] is None:
-                prof_ratings[prof] = 0  # default to 0
+            return
+
+        live_optional: List[Tuple[str, int]] = []
+        exhausted: List[str] = []
+        for course_code in pending_optional:
+            live = domain_masks[course_code] & ~blocked
+            if (
+                max_credits is not None
+                and credits + course_min_credits.get(course_code, 0) > max_credits
+            ):
+                live = 0
+            if live:
+                live_optional.append((course_code, live))
             else:
-                prof_ratings[prof] = data["average_rating"]
-        except Exception as e:
-            print(f"Error fetching rating for professor {prof}: {e}")
-            prof_ratings[prof] = 0
-    prof_ratings["Instructor: TBA"] = 0  # assign average rating for TBA instructors
-    return prof_ratings
+                exhausted.append(course_code)
 
+        skipped.update(exhausted)
+        if not live_optional:
+            stats["explored_fraction"] += share
+            yield assignment
+        else:
+            chosen_course, chosen_live = min(
+                live_optional, key=lambda item: item[1].bit_count()
+            )
+            rest = [c for c, _ in live_optional if c != chosen_course]
+            branch_share = share / (chosen_live.bit_count() + 1)
 
-def get_prof_grades_for_course(professor, course_code):
-    """Fetch grade distribution for a professor-course pair from PlanetTerp API.
+            skipped.add(chosen_course)
+            yield from _search([], rest, blocked, credits, branch_share)
+            skipped.discard(chosen_course)
 
-    Returns:
-        dict: Grade counts by letter grade, or None if data unavailable
-    """
-    try:
-        response = requests.get(
-            P_TERP_PROF_GRADES_CLASS_URL
-            + f"?professor={professor.replace(' ', '%20')}&course={course_code}"
-        )
-        if response.status_code == 400:
-            return None
-
-        grades_data = response.json()
-
-        # Aggregate grades across all semesters for this prof-course pair
-        possible_grades = [
-            "A+",
-            "A",
-            "A-",
-            "B+",
-            "B",
-            "B-",
-            "C+",
-            "C",
-            "C-",
-            "D+",
-            "D",
-            "D-",
-            "F",
-            "W",
-            "Other",
-        ]
-        grade_counts = {grade: 0 for grade in possible_grades}
+            yield from _assign(
+                chosen_course, chosen_live, [], rest, blocked, credits, branch_share
+            )
+        skipped.difference_update(exhausted)
 
-        for semester_data in grades_data:
-            # Verify correct course and professor
-            if semester_data.get("course") != course_code:
-                continue
-            if semester_data.get("professor") != professor:
-                continue
+    yield from _search(list(required_courses), list(optional_courses), 0, 0, 1.0)
 
-            for grade in possible_grades:
-                if grade in semester_data:
-                    grade_counts[grade] += semester_data[grade]
 
-        return grade_counts
-    except Exception as e:
-        print(f"Error fetching grades for {professor} in {course_code}: {e}")
-        return None
+def upstream_deadline() -> Deadline:
+    """A fresh PlanetTerp budget for one request."""
+    return Deadline(get_settings().planetterp_budget_ms / 1000)
 
 
-def calculate_weighted_gpa_for_section(course_code, professors):
-    """Calculate weighted average GPA for a section with one or more professors.
+def fetch_prof_ratings(
+    required_courses: Sequence[str],
+    schedule_inputs: ScheduleInputs,
+    excluded_profs: Optional[Sequence[str]],
+    deadline: Deadline,
+) -> Tuple[Dict[str, float], bool]:
+    """Return PlanetTerp ratings for every candidate instructor, and whether
+    some of them were unavailable and left out.
+
+    Ratings drive the ranking, so they are needed before the search starts.
+    Nothing is fetched when a required course has no viable sections, since
+    no schedule is possible then. TBA instructors get the neutral rating 0.
+    """
+    sections_by_course, _ = schedule_inputs
+    if any(not sections_by_course.get(course) for course in required_courses):
+        return {}, False
+
+    full_profs: Set[str] = set()
+    for sections in sections_by_course.values():
+        for section in sections:
+            full_profs.update(section.get("instructors", []))
+
+    needed_profs = full_profs - set(excluded_profs or [])
+    prof_ratings, _ = get_planetterp().fetch(needed_profs, [], deadline)
+    degraded = not needed_profs <= prof_ratings.keys()
+    prof_ratings["Instructor: TBA"] = 0  # assign average rating for TBA instructors
+    return prof_ratings, degraded
 
-    For co-taught sections, weights each professor's GPA by their grade count.
 
-    Args:
-        course_code: Course identifier (e.g., "CMSC131")
-        professors: List of professor names teaching this section
+def add_section_gpas(schedules: List[Dict[str, Any]], deadline: Deadline) -> bool:
+    """Fill in ``avg_prof_gpa_in_class`` for every section of ``schedules``.
 
-    Returns:
-        float or None: Weighted average GPA rounded to 2 decimals, or None if no data
+    One batched grade lookup covers every distinct instructor combination
+    across the schedules. Returns whether some grades were unavailable, in
+    which case the affected sections get no GPA.
     """
-    if not professors:
-        return None
+    prof_combos: Set[Tuple[str, Tuple[str, ...]]] = set()
+    for schedule in schedules:
+        for section in schedule["sections"]:
+            profs = tuple(sorted(section["instructors"]))
+            if profs:
+                prof_combos.add((section["course_code"], profs))
+
+    grade_keys = {
+        (professor, course_code)
+        for course_code, profs in prof_combos
+        for professor in profs
+    }
+    _, prof_grades = get_planetterp().fetch([], grade_keys, deadline)
+    gpa_cache = {
+        (course_code, profs): _weighted_gpa(
+            prof_grades.get((professor, course_code)) for professor in profs
+        )
+        for course_code, profs in prof_combos
+    }
+
+    for schedule in schedules:
+        for section in schedule["sections"]:
+            section["avg_prof_gpa_in_class"] = gpa_cache.get(
+                (section["course_code"], tuple(sorted(section["instructors"])))
+            )
+    return not grade_keys <= prof_grades.keys()
+
+
+def _weighted_gpa(grade_counts_by_professor: Iterable[Optional[Dict[str, int]]]):
+    """Weighted average GPA over professors' grade counts (None entries skipped).
 
+    Each professor's GPA is weighted by their grade count; returns None if no
+    professor has graded students.
+    """
     grade_to_points = {
         "A+": 4.0,
         "A": 4.0,
@@ -502,11 +581,10 @@ def calculate_weighted_gpa_for_section(course_code, professors):
         "F": 0.0,
     }
 
-    total_weighted_sum = 0
+    total_weighted_sum = 0.0
     total_grade_count = 0
 
-    for professor in professors:
-        grade_counts = get_prof_grades_for_course(professor, course_code)
+    for grade_counts in grade_counts_by_professor:
         if grade_counts is None:
             continue
 
@@ -541,109 +619,188 @@ def build_schedules(
     max_credits: Optional[int] = None,
     min_credits: Optional[int] = None,
     only_open_seats: bool = True,
-):
+    max_search_nodes: Optional[int] = None,
+    search_timeout_seconds: Optional[float] = None,
+    schedule_inputs: Optional[ScheduleInputs] = None,
+    prof_ratings: Optional[Dict[str, float]] = None,
+    include_gpa: bool = True,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Return the top ``max_schedules`` schedules and the search statistics.
+
+    The statistics report ``nodes_explored``, whether the search was
+    ``truncated`` by ``max_search_nodes`` / ``search_timeout_seconds`` (in
+    which case the best schedules found so far are returned), the
+    estimated ``explored_fraction`` of the search space, and whether some
+    PlanetTerp data was ``upstream_degraded`` to neutral values.
+
+    ``schedule_inputs`` is what ``load_schedule_inputs`` returns for the
+    required and optional courses, ``excluded_profs``, ``time_constraints``
+    and ``only_open_seats``; it is loaded here when omitted. Likewise
+    ``prof_ratings`` is what ``fetch_prof_ratings`` returns for them. With
+    ``include_gpa`` false, sections carry no ``avg_prof_gpa_in_class`` until
+    the caller runs ``add_section_gpas``; schedule workers are used that way,
+    so every PlanetTerp call stays in the API process.
+    """
+    started_at = time.monotonic()
+    search_stats: Dict[str, Any] = {
+        "nodes_explored": 0,
+        "truncated": False,
+        "explored_fraction": 1.0,
+        "upstream_degraded": False,
+    }
+    if max_schedules < 1:
+        return [], search_stats
+
+    normalized_optional = []
+    required_set = set(required_courses)
+    for course_code in optional_courses or []:
+        if course_code and course_code not in required_set:
+            normalized_optional.append(course_code)
+
+    if schedule_inputs is None:
+        schedule_inputs = load_schedule_inputs(
+            list(required_courses) + normalized_optional,
+            semester,
+            excluded_profs=excluded_profs,
+            time_constraints=time_constraints,
+            only_open_seats=only_open_seats,
+        )
+    sections_by_course, course_min_credits = schedule_inputs
+
     VARIABLES, DOMAINS = preprocess_restrictions(
         required_courses=required_courses,
         excluded_profs=excluded_profs,
         time_constraints=time_constraints,
         semester=semester,
         only_open_seats=only_open_seats,
+        sections_by_course=sections_by_course,
     )
 
-    normalized_optional = []
-    required_set = set(required_courses)
-    for course_code in optional_courses or []:
-        if course_code and course_code not in required_set:
-            normalized_optional.append(course_code)
-
     _, OPTIONAL_DOMAINS = preprocess_restrictions(
         required_courses=normalized_optional,
         excluded_profs=excluded_profs,
         time_constraints=time_constraints,
         semester=semester,
         only_open_seats=only_open_seats,
+        sections_by_course=sections_by_course,
     )
 
     ALL_DOMAINS = {**DOMAINS, **OPTIONAL_DOMAINS}
 
     # If any required course has no viable sections, no schedules are possible.
     if any(len(DOMAINS.get(course, [])) == 0 for course in required_courses):
-        return []
-
-    # Collect all professors from all sections
-    full_profs = []
-    for course_name, domain in ALL_DOMAINS.items():
-        for section in domain:
-            profs = section.get("instructors", [])
-            full_profs.extend(profs)
-
-    # Cache for professor-course GPA calculations to avoid redundant API calls
-    gpa_cache = {}
-
-    # Pre-calculate GPA for each unique professor-course combination
-    for course_name, domain in ALL_DOMAINS.items():
-        # Get unique professor combinations for this course
-        prof_combos = set()
-        for section in domain:
-            profs = tuple(sorted(section.get("instructors", [])))
-            if profs:
-                prof_combos.add(profs)
-
-        # Calculate GPA for each unique combination
-        for prof_combo in prof_combos:
-            cache_key = (course_name, prof_combo)
-            if cache_key not in gpa_cache:
-                gpa_cache[cache_key] = calculate_weighted_gpa_for_section(
-                    course_name, list(prof_combo)
-                )
-
-    # Add GPA data to each section in the domains
-    for course_name, domain in ALL_DOMAINS.items():
+        return [], search_stats
+
+    CONFLICTS = _build_conflict_bitsets(ALL_DOMAINS)
+
+    # GPAs are only displayed and are fetched after the search, for the
+    # sections that made it into the results. The PlanetTerp budget is only
+    # spent while waiting on PlanetTerp: the GPA lookups get whatever the
+    # rating lookups left over. Lookups that fail or run out of budget fall
+    # back to neutral values (rating 0, no GPA).
+    deadline = upstream_deadline()
+    if prof_ratings is None:
+        prof_ratings, search_stats["upstream_degraded"] = fetch_prof_ratings(
+            required_courses, schedule_inputs, excluded_profs, deadline
+        )
+    upstream_budget = deadline.remaining()
+
+    # Bounded min-heap of the best schedules seen so far, keyed by
+    # ((total_credits, rating), negated choice key). The choice key lists, in
+    # decision order, 1 + the chosen section's domain position (0 for a
+    # skipped optional course); ascending choice keys are the order in which
+    # an exhaustive search over individual sections would meet schedules, so
+    # ties are broken exactly as a stable sort of that enumeration would.
+    top_schedules: List[Tuple[Tuple[int, float], Tuple[int, ...], Dict[str, Dict]]] = []
+
+    # Per-course and per-section summaries for branch-and-bound. Credits are
+    # additive, and an average rating can never exceed the larger of the
+    # current average and the best rating still available.
+    decision_order = list(VARIABLES) + normalized_optional
+    domain_masks: Dict[str, int] = {}
+    course_best_rating: Dict[str, float] = {}
+    section_ratings: List[Tuple[float, int]] = [(0.0, 0)] * len(CONFLICTS)
+    for course_code, domain in ALL_DOMAINS.items():
+        domain_mask = 0
+        best_rating = 0.0
         for section in domain:
-            profs = tuple(sorted(section.get("instructors", [])))
-            cache_key = (course_name, profs)
-            section["avg_prof_gpa_in_class"] = gpa_cache.get(cache_key)
-
-    # Get professor ratings
-    prof_ratings = get_prof_ratings(full_profs, excluded_profs)
-
-    # Generate base schedules for required courses only.
-    required_schedules = backtrack_schedules(VARIABLES, DOMAINS)
-
-    course_min_credits = _get_course_min_credits_map(
-        list(required_courses) + normalized_optional
-    )
-
-    # Expand each required-only schedule by optionally including extra courses.
-    expanded_schedules: List[Dict[str, Dict]] = []
-    for base_schedule in required_schedules:
-        if normalized_optional:
-            expanded_schedules.extend(
-                _expand_schedule_with_optional_courses(
-                    base_schedule=base_schedule,
-                    optional_course_codes=normalized_optional,
-                    optional_domains=OPTIONAL_DOMAINS,
-                    course_min_credits=course_min_credits,
-                    max_credits=max_credits,
-                )
-            )
-        else:
-            expanded_schedules.append(base_schedule.copy())
-
-    # Dedupe expanded schedules across base schedules.
-    seen = set()
-    unique_schedules = []
-    for schedule in expanded_schedules:
-        signature = _schedule_signature(schedule)
-        if signature in seen:
-            continue
-        seen.add(signature)
-        unique_schedules.append(schedule)
-
-    schedule_records = []
-    for unique_schedule in unique_schedules:
+            domain_mask |= 1 << section["candidate_index"]
+            ratings = [prof_ratings.get(i, 0) for i in section.get("instructors", [])]
+            section_ratings[section["candidate_index"]] = (sum(ratings), len(ratings))
+            best_rating = max([best_rating, *ratings])
+        domain_masks[course_code] = domain_mask
+        course_best_rating[course_code] = best_rating
+
+    def _can_improve(
+        schedule: Dict[str, Dict], skipped: Set[str], blocked: int
+    ) -> bool:
+        credits_bound = 0
+        rating_sum = 0.0
+        rating_count = 0
+        for course_code, section in schedule.items():
+            credits_bound += course_min_credits.get(course_code, 0)
+            section_sum, section_count = section_ratings[section["candidate_index"]]
+            rating_sum += section_sum
+            rating_count += section_count
+        rating_bound = rating_sum / rating_count if rating_count else 0.0
+
+        for course_code in decision_order:
+            if course_code in schedule or course_code in skipped:
+                continue
+            if not domain_masks.get(course_code, 0) & ~blocked:
+                if course_code in required_set:
+                    return False
+                continue
+            credits_bound += course_min_credits.get(course_code, 0)
+            rating_bound = max(rating_bound, course_best_rating[course_code])
+
+        if max_credits is not None:
+            credits_bound = min(credits_bound, max_credits)
+        if min_credits is not None and credits_bound < min_credits:
+            return False
+        if len(top_schedules) < max_schedules:
+            return True
+
+        rank_bound = (credits_bound, round(rating_bound + 1e-9, 2))
+        worst_rank, worst_choice_key = top_schedules[0][:2]
+        if rank_bound != worst_rank:
+            return rank_bound > worst_rank
+
+        # On a tie, the subtree can only win with its earliest schedule, which
+        # skips every undecided optional course and takes the first section of
+        # every undecided required one.
+        def _earliest_choice(course_code: str) -> int:
+            if course_code in schedule:
+                return -(schedule[course_code]["domain_position"] + 1)
+            elif course_code in required_set:
+                return -1
+            else:
+                return 0
+
+        earliest_choice_key = tuple(map(_earliest_choice, decision_order))
+        return earliest_choice_key > worst_choice_key
+
+    for schedule in search_schedules(
+        required_courses=VARIABLES,
+        optional_courses=normalized_optional,
+        domains=ALL_DOMAINS,
+        conflicts=CONFLICTS,
+        course_min_credits=course_min_credits,
+        max_credits=max_credits,
+        can_improve=_can_improve,
+        max_nodes=max_search_nodes,
+        deadline=(
+            started_at + search_timeout_seconds
+            if search_timeout_seconds is not None
+            else None
+        ),
+        stats=search_stats,
+    ):
+        scheduled_courses = [
+            course_code for course_code in decision_order if course_code in schedule
+        ]
         total_credits = sum(
-            course_min_credits.get(course_code, 0) for course_code in unique_schedule
+            course_min_credits.get(course_code, 0) for course_code in scheduled_courses
         )
 
         # Defensive filter in case any schedule slipped past expansion checks.
@@ -652,56 +809,45 @@ def build_schedules(
         if min_credits is not None and total_credits < min_credits:
             continue
 
-        avg_schedule_prof_rating = 0.0
-        total_instructors = 0
-        for section in unique_schedule.values():
-            instructors = section.get("instructors", [])
-            for instructor in instructors:
-                try:
-                    avg_schedule_prof_rating += prof_ratings.get(instructor, 0)
-                    total_instructors += 1
-                except Exception as e:
-                    print(f"Error adding rating for professor {instructor}: {e}")
-                    continue
-
-        if total_instructors > 0:
-            avg_schedule_prof_rating = round(
-                avg_schedule_prof_rating / total_instructors,
-                2,
-            )
-        # else:
-        #     avg_schedule_prof_rating = None
-
-        included_optional_courses = sorted(
-            [
-                course_code
-                for course_code in normalized_optional
-                if course_code in unique_schedule
-            ]
+        rank = (
+            total_credits,
+            _average_professor_rating(
+                (schedule[course_code] for course_code in scheduled_courses),
+                prof_ratings,
+            ),
         )
+        if len(top_schedules) >= max_schedules and rank < top_schedules[0][0]:
+            continue
 
-        schedule_records.append(
-            {
-                "schedule": unique_schedule,
-                "average_professor_rating": avg_schedule_prof_rating,
-                "total_credits": total_credits,
-                "included_optional_courses": included_optional_courses,
-            }
-        )
+        # Expand the equivalence classes into concrete schedules in choice-key
+        # order; once one fails to make the cut, every later one fails too.
+        for members in itertools.product(
+            *(
+                schedule[course_code]["equivalent_sections"]
+                for course_code in scheduled_courses
+            )
+        ):
+            chosen = dict(zip(scheduled_courses, members))
+            choice_key = tuple(
+                (
+                    -(chosen[course_code]["domain_position"] + 1)
+                    if course_code in chosen
+                    else 0
+                )
+                for course_code in decision_order
+            )
+            if len(top_schedules) < max_schedules:
+                heapq.heappush(top_schedules, (rank, choice_key, chosen))
+            elif (rank, choice_key) > top_schedules[0][:2]:
+                heapq.heapreplace(top_schedules, (rank, choice_key, chosen))
+            else:
+                break
 
-    schedule_records.sort(
-        key=lambda record: (
-            record["total_credits"],
-            record["average_professor_rating"]
-            if record["average_professor_rating"] is not None
-            else -1,
-        ),
-        reverse=True,
-    )
+    results = sorted(top_schedules, reverse=True)
 
     api_schedules = []
-    for record in schedule_records[:max_schedules]:
-        record_schedule: Dict[str, Dict[Any, Any]] = record["schedule"]
+    for rank, _, record_schedule in results:
+        total_credits, avg_schedule_prof_rating = rank
         sections = []
         for course_code, section in sorted(
             record_schedule.items(), key=lambda item: item[0]
@@ -714,17 +860,29 @@ def build_schedules(
                 "open_seats": section.get("open_seats", 0),
                 "waitlist": section.get("waitlist", 0),
                 "meetings": section.get("meetings", []),
-                "avg_prof_gpa_in_class": section.get("avg_prof_gpa_in_class"),
+                "avg_prof_gpa_in_class": None,
             }
             sections.append(section_payload)
 
+        included_optional_courses = sorted(
+            [
+                course_code
+                for course_code in normalized_optional
+                if course_code in record_schedule
+            ]
+        )
+
         api_schedules.append(
             {
                 "sections": sections,
-                "average_professor_rating": record["average_professor_rating"],
-                "total_credits": record["total_credits"],
-                "included_optional_courses": record["included_optional_courses"],
+                "average_professor_rating": avg_schedule_prof_rating,
+                "total_credits": total_credits,
+                "included_optional_courses": included_optional_courses,
             }
         )
 
-    return api_schedules
+    if include_gpa and add_section_gpas(api_schedules, Deadline(upstream_budget)):
+        search_stats["upstream_degraded"] = True
+
+    search_stats["explored_fraction"] = round(search_stats["explored_fraction"], 4)
+    return api_schedules, search_stats
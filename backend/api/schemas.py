@@ -34,8 +34,26 @@ class CourseDetail(BaseModel):
     sections: List[Section] = Field(default_factory=list)
 
 
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    entries: int
+    max_entries: int
+
+
+class BreakerStats(BaseModel):
+    state: str
+    consecutive_failures: int
+    successes: int
+    failures: int
+    rejected: int
+    times_opened: int
+
+
 class StatusResponse(BaseModel):
     last_updated: Optional[datetime]
+    schedule_cache: Optional[CacheStats] = None
+    planetterp_breaker: Optional[BreakerStats] = None
 
 
 class Semester(BaseModel):
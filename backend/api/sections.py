@@ -0,0 +1,246 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from common.meeting_times import meeting_block
+
+
+# Newest active semester, falling back to the newest semester of any kind.
+ACTIVE_OR_LATEST_SEMESTER_SQL = """
+    SELECT semester_code
+    FROM semesters
+    ORDER BY is_active IS TRUE DESC, semester_code DESC
+    LIMIT 1
+"""
+
+
+def get_active_or_latest_semester_code(cursor) -> Optional[str]:
+    cursor.execute(ACTIVE_OR_LATEST_SEMESTER_SQL)
+    row = cursor.fetchone()
+    return row["semester_code"] if row else None
+
+
+def get_semester_data_version(cursor, semester: str) -> Optional[str]:
+    """Return a token that changes whenever the scraper rewrites a semester."""
+    cursor.execute(
+        """
+        SELECT MAX(last_updated) AS last_updated
+        FROM sections
+        WHERE semester_code = %s
+    """,
+        (semester,),
+    )
+    row = cursor.fetchone()
+    if not row or row["last_updated"] is None:
+        return None
+    return row["last_updated"].isoformat()
+
+
+def normalize_instructor_names(names: Sequence[str]) -> List[str]:
+    """Sorted, de-duplicated ``section_instructors.instructor_key`` values."""
+    return sorted({name.strip().lower() for name in names} - {""})
+
+
+def load_sections_by_course(
+    cursor, course_codes: Sequence[str], semester: str
+) -> Dict[str, List[Dict]]:
+    """Load sections and their meetings for many courses in two queries.
+
+    Returns a dict with an entry (possibly empty) for every requested course;
+    sections are ordered by section code, bytewise like Python strings, and each carries a ``meetings`` list
+    and its scheduled ``compiled_meetings`` as (day_mask, start, end) triples.
+    """
+    sections_by_course: Dict[str, List[Dict]] = {code: [] for code in course_codes}
+    if not sections_by_course:
+        return sections_by_course
+
+    cursor.execute(
+        """
+        SELECT id, course_code, section_code, instructors,
+               total_seats, open_seats, waitlist
+        FROM sections
+        WHERE course_code = ANY(%s) AND semester_code = %s
+        ORDER BY course_code COLLATE "C" ASC, section_code COLLATE "C" ASC
+    """,
+        (list(sections_by_course), semester),
+    )
+    sections_by_id: Dict[int, Dict] = {}
+    blocks_by_id: Dict[int, List[Tuple[int, int, int]]] = {}
+    for section in cursor.fetchall():
+        section["meetings"] = []
+        sections_by_id[section["id"]] = section
+        blocks_by_id[section["id"]] = []
+        sections_by_course[section["course_code"]].append(section)
+
+    if not sections_by_id:
+        return sections_by_course
+
+    cursor.execute(
+        """
+        SELECT section_id, days, start_time, end_time, building_code, room, class_type,
+               day_mask, start_minute, end_minute
+        FROM section_meetings
+        WHERE section_id = ANY(%s)
+        ORDER BY section_id ASC, id ASC
+    """,
+        (list(sections_by_id),),
+    )
+    for meeting in cursor.fetchall():
+        section_id = meeting.pop("section_id")
+        day_mask = meeting.pop("day_mask")
+        start_minute = meeting.pop("start_minute")
+        end_minute = meeting.pop("end_minute")
+        if day_mask is None or (day_mask and None in (start_minute, end_minute)):
+            # Not backfilled yet, so the numeric columns say nothing; parse
+            # the text ones instead.
+            block = meeting_block(
+                meeting["days"], meeting["start_time"], meeting["end_time"]
+            )
+            if block is not None:
+                blocks_by_id[section_id].append(block)
+        elif day_mask:
+            blocks_by_id[section_id].append((day_mask, start_minute, end_minute))
+        sections_by_id[section_id]["meetings"].append(meeting)
+
+    for section_id, blocks in blocks_by_id.items():
+        sections_by_id[section_id]["compiled_meetings"] = tuple(blocks)
+
+    return sections_by_course
+
+
+def load_course_offerings(
+    cursor,
+    course_codes: Sequence[str],
+    semester: str,
+    excluded_profs: Sequence[str] = (),
+    blocked_windows: Sequence[Tuple[int, int, int]] = (),
+    only_open_seats: bool = False,
+) -> Tuple[Dict[str, List[Dict]], Dict[str, Optional[str]]]:
+    """Load the schedulable sections and catalog credits for many courses.
+
+    Returns ``(sections_by_course, credits_by_course)``. ``sections_by_course``
+    has the same shape as ``load_sections_by_course``, minus freshman
+    connection (FC) sections, sections taught by any of ``excluded_profs``
+    (matched case-insensitively), sections with a meeting overlapping any of
+    the (day_mask, start, end) ``blocked_windows`` and, if ``only_open_seats``,
+    full sections; the filtering happens in the query. ``credits_by_course``
+    only has entries for courses that exist in the catalog.
+
+    Meetings whose numeric time columns have not been backfilled yet cannot
+    be checked in the query; sections with such a meeting come back with
+    ``compiled_meetings`` set to None, for the caller to compile from the
+    meeting text and check against ``blocked_windows`` itself.
+    """
+    sections_by_course: Dict[str, List[Dict]] = {code: [] for code in course_codes}
+    credits_by_course: Dict[str, Optional[str]] = {}
+    if not sections_by_course:
+        return sections_by_course, credits_by_course
+
+    # TODO: handle freshman connection sections specially later, must be all
+    # FC or no FC.
+    section_filter = "AND strpos(s.section_code, 'FC') = 0"
+    params: List = [semester]
+    if only_open_seats:
+        section_filter += " AND s.open_seats >= 1"
+    excluded_keys = normalize_instructor_names(excluded_profs)
+    if excluded_keys:
+        section_filter += """
+            AND NOT EXISTS (
+                SELECT 1
+                FROM section_instructors si
+                WHERE si.section_id = s.id AND si.instructor_key = ANY(%s)
+            )
+        """
+        params.append(excluded_keys)
+    if blocked_windows:
+        # Same overlap rule as the scheduler's _minutes_overlap. Meetings with
+        # NULL time columns never match here; see compiled_meetings below.
+        section_filter += """
+            AND NOT EXISTS (
+                SELECT 1
+                FROM section_meetings sm
+                JOIN unnest(%s::int[], %s::int[], %s::int[])
+                    AS b(day_mask, start_minute, end_minute)
+                    ON sm.day_mask & b.day_mask <> 0
+                WHERE sm.section_id = s.id
+                  AND (
+                      sm.start_minute = b.start_minute
+                      OR (
+                          sm.start_minute < b.start_minute
+                          AND sm.end_minute > b.start_minute
+                      )
+                      OR (
+                          sm.start_minute > b.start_minute
+                          AND b.end_minute > sm.start_minute
+                      )
+                  )
+            )
+        """
+        params.extend(list(column) for column in zip(*blocked_windows))
+    params.append(list(sections_by_course))
+
+    cursor.execute(
+        f"""
+        SELECT
+            c.course_code,
+            c.credits,
+            s.id,
+            s.section_code,
+            s.instructors,
+            s.total_seats,
+            s.open_seats,
+            s.waitlist,
+            COALESCE(
+                (
+                    SELECT json_agg(
+                        json_build_object(
+                            'days', sm.days,
+                            'start_time', sm.start_time,
+                            'end_time', sm.end_time,
+                            'building_code', sm.building_code,
+                            'room', sm.room,
+                            'class_type', sm.class_type
+                        )
+                        ORDER BY sm.id
+                    )
+                    FROM section_meetings sm
+                    WHERE sm.section_id = s.id
+                ),
+                '[]'::json
+            ) AS meetings,
+            CASE
+                WHEN EXISTS (
+                    SELECT 1
+                    FROM section_meetings sm
+                    WHERE sm.section_id = s.id
+                      AND (
+                          sm.day_mask IS NULL
+                          OR (
+                              sm.day_mask <> 0
+                              AND (sm.start_minute IS NULL OR sm.end_minute IS NULL)
+                          )
+                      )
+                )
+                THEN NULL
+                ELSE ARRAY(
+                    SELECT ARRAY[sm.day_mask, sm.start_minute, sm.end_minute]
+                    FROM section_meetings sm
+                    WHERE sm.section_id = s.id AND sm.day_mask <> 0
+                    ORDER BY sm.id
+                )
+            END AS compiled_meetings
+        FROM courses c
+        LEFT JOIN sections s
+            ON s.course_code = c.course_code AND s.semester_code = %s
+            {section_filter}
+        WHERE c.course_code = ANY(%s)
+        ORDER BY c.course_code COLLATE "C" ASC, s.section_code COLLATE "C" ASC
+    """,
+        params,
+    )
+    for row in cursor.fetchall():
+        credits_by_course[row["course_code"]] = row.pop("credits")
+        if row["id"] is not None:
+            if row["compiled_meetings"] is not None:
+                row["compiled_meetings"] = tuple(map(tuple, row["compiled_meetings"]))
+            sections_by_course[row["course_code"]].append(row)
+
+    return sections_by_course, credits_by_course
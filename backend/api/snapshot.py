@@ -0,0 +1,309 @@
+import time
+from bisect import bisect_right
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from common.meeting_times import days_to_mask
+from common.settings import get_settings
+
+from api.database import get_db_connection
+from api.sections import (
+    get_active_or_latest_semester_code,
+    load_sections_by_course,
+    normalize_instructor_names,
+)
+
+
+class SemesterSnapshot:
+    """Immutable in-memory copy of the course catalog and one semester's sections.
+
+    Section dicts are shared by every request reading the snapshot, so callers
+    must copy a section before annotating it.
+    """
+
+    def __init__(
+        self,
+        *,
+        semester_code: str,
+        sections_version,
+        courses_version,
+        courses: Dict[str, Dict],
+        sections_by_course: Dict[str, List[Dict]],
+    ):
+        self.semester_code = semester_code
+        self.sections_version = sections_version
+        self.courses_version = courses_version
+        self.courses = courses
+        self.sections_by_course = sections_by_course
+
+        # Every section in (course_code, section_code) order, the order the
+        # section search endpoint returns, plus instructor key (the stripped,
+        # lowercased name, as in section_instructors) -> positions in that list.
+        self.ordered_sections = [
+            (course_code, section)
+            for course_code in sorted(sections_by_course)
+            for section in sections_by_course[course_code]
+        ]
+        self.section_keys = [
+            (course_code, section["section_code"])
+            for course_code, section in self.ordered_sections
+        ]
+        self.sections_by_instructor: Dict[str, List[int]] = {}
+        for position, (_, section) in enumerate(self.ordered_sections):
+            for key in normalize_instructor_names(
+                [name for name in section.get("instructors") or [] if name]
+            ):
+                self.sections_by_instructor.setdefault(key, []).append(position)
+
+    @property
+    def data_version(self) -> Optional[str]:
+        """Same token as ``get_semester_data_version`` for this semester."""
+        if self.sections_version is None:
+            return None
+        return self.sections_version.isoformat()
+
+    def section_ids_taught_by(self, instructors: Sequence[str]) -> Set[int]:
+        """Ids of the sections taught by any of ``instructors`` (case-insensitive)."""
+        return {
+            self.ordered_sections[position][1]["id"]
+            for key in normalize_instructor_names(instructors)
+            for position in self.sections_by_instructor.get(key, [])
+        }
+
+    def search_sections(
+        self,
+        *,
+        status: Optional[str] = None,
+        instructor: Optional[str] = None,
+        days: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        after: Optional[Tuple[str, ...]] = None,
+    ) -> List[Dict]:
+        """In-memory equivalent of the ``/api/v1/sections`` query.
+
+        ``status`` is ``"open"``, ``"closed"`` or None; ``instructor`` is a
+        case-insensitive substring match like the SQL ILIKE. ``days`` matches
+        sections with a scheduled meeting on all of the given days, or is a
+        substring match when it names no day. ``after`` is a
+        ``(course_code, section_code)`` keyset cursor.
+        """
+        start = bisect_right(self.section_keys, after) if after is not None else 0
+        if instructor is not None:
+            needle = instructor.lower()
+            positions = sorted(
+                {
+                    position
+                    for name, name_positions in self.sections_by_instructor.items()
+                    if needle in name
+                    for position in name_positions
+                    if position >= start
+                }
+            )
+            candidates = [self.ordered_sections[position] for position in positions]
+        else:
+            candidates = self.ordered_sections[start:]
+
+        day_mask = days_to_mask(days) if days else 0
+        days_needle = days.lower() if days is not None and not day_mask else None
+        results: List[Dict] = []
+        skipped = 0
+        for course_code, section in candidates:
+            open_seats = section.get("open_seats")
+            if status == "open" and not (open_seats is not None and open_seats > 0):
+                continue
+            if status == "closed" and not (open_seats is not None and open_seats <= 0):
+                continue
+            if day_mask and not any(
+                block_days & day_mask == day_mask
+                for block_days, _, _ in section["compiled_meetings"]
+            ):
+                continue
+            if days_needle is not None and not any(
+                meeting.get("days") is not None
+                and days_needle in meeting["days"].lower()
+                for meeting in section["meetings"]
+            ):
+                continue
+
+            if skipped < offset:
+                skipped += 1
+                continue
+
+            course = self.courses.get(course_code) or {}
+            results.append(
+                {
+                    "course_code": course_code,
+                    "course_title": course.get("title"),
+                    "semester_code": self.semester_code,
+                    "section_code": section["section_code"],
+                    "instructors": section["instructors"],
+                    "total_seats": section["total_seats"],
+                    "open_seats": section["open_seats"],
+                    "waitlist": section["waitlist"],
+                    "meetings": section["meetings"],
+                }
+            )
+            if len(results) >= limit:
+                break
+
+        return results
+
+
+# Everything but the search vector, which only the database needs.
+_COURSE_COLUMNS_SQL = """
+    SELECT
+        course_code, department_code, title, credits, description,
+        grading_options, gened_codes, attributes, last_updated
+    FROM courses
+"""
+
+
+def _load_snapshot(cursor, previous: Optional[SemesterSnapshot]):
+    semester = get_active_or_latest_semester_code(cursor)
+    if semester is None:
+        return None
+
+    # Versions are read before the data so that rows written while loading are
+    # picked up again by the next poll rather than missed.
+    cursor.execute(
+        """
+        SELECT
+            (
+                SELECT MAX(last_updated)
+                FROM sections
+                WHERE semester_code = %s
+            ) AS sections_version,
+            (SELECT MAX(last_updated) FROM courses) AS courses_version
+    """,
+        (semester,),
+    )
+    versions = cursor.fetchone()
+    sections_version = versions["sections_version"]
+    courses_version = versions["courses_version"]
+
+    if (
+        previous is not None
+        and previous.semester_code == semester
+        and previous.sections_version is not None
+        and previous.courses_version is not None
+    ):
+        if (
+            previous.sections_version == sections_version
+            and previous.courses_version == courses_version
+        ):
+            return previous
+
+        # The scraper only upserts, bumping last_updated on every row it
+        # changes, so reloading the courses with newer rows is enough.
+        courses = dict(previous.courses)
+        if courses_version != previous.courses_version:
+            cursor.execute(
+                f"{_COURSE_COLUMNS_SQL} WHERE last_updated > %s",
+                (previous.courses_version,),
+            )
+            courses.update((row["course_code"], row) for row in cursor.fetchall())
+
+        sections_by_course = dict(previous.sections_by_course)
+        if sections_version != previous.sections_version:
+            cursor.execute(
+                """
+                SELECT DISTINCT course_code
+                FROM sections
+                WHERE semester_code = %s AND last_updated > %s
+            """,
+                (semester, previous.sections_version),
+            )
+            changed_courses = [row["course_code"] for row in cursor.fetchall()]
+            sections_by_course.update(
+                load_sections_by_course(cursor, changed_courses, semester)
+            )
+    else:
+        cursor.execute(_COURSE_COLUMNS_SQL)
+        courses = {row["course_code"]: row for row in cursor.fetchall()}
+
+        cursor.execute(
+            "SELECT DISTINCT course_code FROM sections WHERE semester_code = %s",
+            (semester,),
+        )
+        offered_courses = [row["course_code"] for row in cursor.fetchall()]
+        sections_by_course = load_sections_by_course(cursor, offered_courses, semester)
+
+    return SemesterSnapshot(
+        semester_code=semester,
+        sections_version=sections_version,
+        courses_version=courses_version,
+        courses=courses,
+        sections_by_course=sections_by_course,
+    )
+
+
+class SemesterSnapshotStore:
+    """Holds the active semester in memory, polling Postgres for changes.
+
+    At most one poll runs every ``refresh_seconds``; while it runs, other
+    threads keep reading the previous snapshot. A ``refresh_seconds`` below 1
+    disables the snapshot and every lookup returns None.
+    """
+
+    def __init__(self, *, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[SemesterSnapshot] = None
+        self._checked_at: Optional[float] = None
+        self._lock = Lock()
+
+    def get(
+        self, semester: Optional[str] = None, refresh: bool = True
+    ) -> Optional[SemesterSnapshot]:
+        """Return the snapshot if it covers ``semester`` (None means active).
+
+        With ``refresh=False`` a due poll is skipped, so the call never blocks.
+        """
+        if self.refresh_seconds < 1:
+            return None
+
+        if refresh:
+            self._refresh_if_due()
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if semester and semester.strip() != snapshot.semester_code:
+            return None
+        return snapshot
+
+    def needs_refresh(self) -> bool:
+        """True when the next ``get`` may block on a Postgres poll."""
+        return self.refresh_seconds >= 1 and not self._is_fresh()
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at < self.refresh_seconds
+        )
+
+    def _refresh_if_due(self) -> None:
+        if self._is_fresh():
+            return
+
+        # Before the first load every caller waits for it; afterwards the
+        # callers that lose the race serve the current snapshot.
+        if not self._lock.acquire(blocking=self._snapshot is None):
+            return
+        try:
+            if self._is_fresh():
+                return
+            try:
+                with get_db_connection() as cursor:
+                    self._snapshot = _load_snapshot(cursor, self._snapshot)
+            except Exception as e:
+                # Keep serving the last good snapshot (or the Postgres path,
+                # before the first load) and retry after refresh_seconds.
+                print(f"Error refreshing semester snapshot: {e}")
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+
+semester_snapshots = SemesterSnapshotStore(
+    refresh_seconds=get_settings().api_snapshot_refresh_seconds
+)
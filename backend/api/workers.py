@@ -0,0 +1,89 @@
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import BoundedSemaphore, Lock
+from typing import Any, Dict, List, Tuple
+
+from api.scheduler import build_schedules
+
+
+class ScheduleQueueFullError(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class ScheduleWorkerCrashedError(RuntimeError):
+    """Raised when a worker died mid-job; the pool has been restarted."""
+
+
+def _init_worker() -> None:
+    """Prepare a freshly spawned worker process.
+
+    Ctrl-C reaches the whole process group, but shutting the workers down is
+    the API process's job, so workers ignore SIGINT. The scheduler module is
+    imported here rather than by the first job. Importing it opens nothing:
+    workers are handed their inputs and PlanetTerp ratings, so they never
+    touch the database or PlanetTerp.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import api.scheduler  # noqa: F401
+
+
+class ScheduleWorkerPool:
+    """Runs ``build_schedules`` in a pool of long-lived worker processes.
+
+    Workers are spawned rather than forked so they inherit no sockets, locks
+    or threads from the API process; they stay up for the life of the API
+    process, keeping imported state warm between jobs. Only the CPU-bound
+    search runs in them: callers load the inputs and PlanetTerp data in the
+    API process and pass ``include_gpa=False``. At most ``workers + queue_depth``
+    jobs are admitted at once, and callers beyond that are rejected instead of
+    piling up behind the pool.
+
+    If a worker dies (for example OOM-killed by a heavy search), the executor
+    is broken for good; it is replaced and the affected jobs are failed with
+    ScheduleWorkerCrashedError so later jobs run on fresh workers.
+    """
+
+    def __init__(self, *, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor = self._new_executor()
+        self._executor_lock = Lock()
+        self._slots = BoundedSemaphore(workers + queue_depth)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def _replace_broken_executor(self, broken: ProcessPoolExecutor) -> None:
+        with self._executor_lock:
+            # Every job on the broken pool fails at once; rebuild only once.
+            if self._executor is broken:
+                self._executor = self._new_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def build_schedules(
+        self, **kwargs: Any
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        if not self._slots.acquire(blocking=False):
+            raise ScheduleQueueFullError(
+                "Schedule generation is at capacity. Try again shortly."
+            )
+
+        executor = self._executor
+        try:
+            return executor.submit(build_schedules, **kwargs).result()
+        except BrokenProcessPool as exc:
+            self._replace_broken_executor(executor)
+            raise ScheduleWorkerCrashedError(
+                "A schedule worker stopped unexpectedly. Try again shortly."
+            ) from exc
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
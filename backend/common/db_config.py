@@ -47,3 +47,23 @@ def create_threaded_connection_pool(minconn=None, maxconn=None):
         resolved_maxconn,
         **get_db_connect_params(),
     )
+
+
+def create_async_connection_pool(minconn=None, maxconn=None):
+    """Create an unopened psycopg 3 AsyncConnectionPool using shared DB config.
+
+    psycopg 3 is only needed when DB_ASYNC_ENABLED is set, so it is imported
+    here rather than at module level. Open the pool from a running event loop.
+    """
+    from psycopg_pool import AsyncConnectionPool
+
+    settings = get_settings()
+    connect_kwargs = get_db_connect_params()
+    conninfo = connect_kwargs.pop("dsn", "")
+    return AsyncConnectionPool(
+        conninfo,
+        kwargs=connect_kwargs,
+        min_size=settings.db_pool_min if minconn is None else minconn,
+        max_size=settings.db_async_pool_max if maxconn is None else maxconn,
+        open=False,
+    )
@@ -0,0 +1,120 @@
+from datetime import datetime
+from typing import Optional, Set, Tuple
+
+DAY_TOKEN_BITS = {"M": 1, "T": 2, "W": 4, "R": 8, "F": 16, "S": 32, "U": 64}
+
+
+def parse_time_to_minutes(t: str):
+    """Parse 12h (with am/pm) or 24h time string to minutes since midnight.
+    Returns None on parse failure or empty input.
+    Examples accepted: '10:00am', '10:00 am', '12:50pm', '13:00', '09:05'
+    """
+    if not t:
+        return None
+    s = t.strip().lower().replace(".", "")
+    # remove interior space before am/pm if present
+    if s.endswith(" am") or s.endswith(" pm"):
+        s = s.replace(" ", "")
+    try:
+        if s.endswith("am") or s.endswith("pm"):
+            dt = datetime.strptime(s, "%I:%M%p")
+        else:
+            dt = datetime.strptime(s, "%H:%M")
+        return dt.hour * 60 + dt.minute
+    except Exception:
+        return None
+
+
+def normalize_day_token(day: str) -> Optional[str]:
+    if not day:
+        return None
+
+    normalized = day.strip().lower()
+    mapping = {
+        "m": "M",
+        "mon": "M",
+        "monday": "M",
+        "t": "T",
+        "tu": "T",
+        "tue": "T",
+        "tues": "T",
+        "tuesday": "T",
+        "w": "W",
+        "wed": "W",
+        "wednesday": "W",
+        "r": "R",
+        "th": "R",
+        "thu": "R",
+        "thur": "R",
+        "thurs": "R",
+        "thursday": "R",
+        "f": "F",
+        "fri": "F",
+        "friday": "F",
+        "s": "S",
+        "sat": "S",
+        "saturday": "S",
+        "u": "U",
+        "sun": "U",
+        "sunday": "U",
+    }
+    return mapping.get(normalized)
+
+
+def parse_days_to_tokens(days: str) -> Set[str]:
+    if not days:
+        return set()
+
+    s = days.strip().lower().replace(" ", "")
+    tokens = []
+    i = 0
+    while i < len(s):
+        if s.startswith("th", i):
+            tokens.append("R")
+            i += 2
+            continue
+        if s.startswith("tu", i):
+            tokens.append("T")
+            i += 2
+            continue
+        if s.startswith("su", i):
+            tokens.append("U")
+            i += 2
+            continue
+        if s.startswith("sa", i):
+            tokens.append("S")
+            i += 2
+            continue
+
+        mapped = normalize_day_token(s[i])
+        if mapped:
+            tokens.append(mapped)
+        i += 1
+
+    return set(tokens)
+
+
+def days_to_mask(days: str) -> int:
+    mask = 0
+    for token in parse_days_to_tokens(days):
+        mask |= DAY_TOKEN_BITS[token]
+    return mask
+
+
+def meeting_block(
+    days: Optional[str], start_time: Optional[str], end_time: Optional[str]
+) -> Optional[Tuple[int, int, int]]:
+    """Return ``(day_mask, start_minute, end_minute)`` for a scheduled meeting.
+
+    Meetings without days or parseable times (online/TBA blocks) return None;
+    they never conflict with anything.
+    """
+    day_mask = days_to_mask(days or "")
+    if not day_mask:
+        return None
+
+    start = parse_time_to_minutes(start_time or "")
+    end = parse_time_to_minutes(end_time or "")
+    if start is None or end is None:
+        return None
+    return day_mask, start, end
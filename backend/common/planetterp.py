@@ -0,0 +1,248 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+import requests
+from common.upstream import CircuitBreaker, Deadline, UpstreamUnavailable
+from requests.adapters import HTTPAdapter
+
+PROFESSOR_URL = "https://planetterp.com/api/v1/professor"
+GRADES_URL = "https://planetterp.com/api/v1/grades"
+
+POSSIBLE_GRADES = [
+    "A+",
+    "A",
+    "A-",
+    "B+",
+    "B",
+    "B-",
+    "C+",
+    "C",
+    "C-",
+    "D+",
+    "D",
+    "D-",
+    "F",
+    "W",
+    "Other",
+]
+
+# Letter grade -> number of students, and the (professor, course_code) pair
+# it was fetched for.
+GradeCounts = Dict[str, int]
+GradeKey = Tuple[str, str]
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class PlanetTerpClient:
+    """Thread-safe PlanetTerp client with a keep-alive session.
+
+    Every call has a ``timeout_seconds`` limit, and batched lookups fan out
+    over a shared pool of ``max_concurrency`` threads, which also caps the
+    number of requests in flight across all callers.
+
+    With a ``breaker``, calls fail fast with UpstreamUnavailable while it is
+    open. Methods taking a ``deadline`` shorten each call's timeout to what is
+    left of it, and batched lookups stop waiting once it passes.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout_seconds: float,
+        max_concurrency: int,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="planetterp"
+        )
+
+    def _get(
+        self, url: str, params: Dict[str, str], deadline: Optional[Deadline]
+    ) -> requests.Response:
+        timeout = (
+            deadline.timeout(self.timeout_seconds)
+            if deadline is not None
+            else self.timeout_seconds
+        )
+        if self.breaker is None:
+            return self._session.get(url, params=params, timeout=timeout)
+
+        self.breaker.before_call()
+        try:
+            response = self._session.get(url, params=params, timeout=timeout)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        except requests.Timeout:
+            # A call cut short by the request's deadline says nothing about
+            # PlanetTerp's health; only a full-length timeout counts.
+            if timeout < self.timeout_seconds:
+                self.breaker.record_inconclusive()
+            else:
+                self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return response
+
+    def get_professor_rating(
+        self, professor: str, deadline: Optional[Deadline] = None
+    ) -> float:
+        """Average rating of ``professor``; 0 when PlanetTerp has none.
+
+        Raises if the lookup itself fails (network error, bad response).
+        """
+        response = self._get(PROFESSOR_URL, {"name": professor}, deadline)
+        data = response.json()
+        if "error" in data or data["average_rating"] is None:
+            return 0
+        return data["average_rating"]
+
+    def get_grades(
+        self, professor: str, course_code: str, deadline: Optional[Deadline] = None
+    ) -> Optional[GradeCounts]:
+        """Grade counts for a professor-course pair, summed over all semesters.
+
+        Returns None if PlanetTerp has no data for the pair and raises if the
+        lookup itself fails.
+        """
+        response = self._get(
+            GRADES_URL, {"professor": professor, "course": course_code}, deadline
+        )
+        if response.status_code == 400:
+            return None
+
+        grade_counts = _empty_grade_counts()
+        for semester_data in response.json():
+            # Verify correct course and professor
+            if semester_data.get("course") != course_code:
+                continue
+            if semester_data.get("professor") != professor:
+                continue
+
+            _add_grades(grade_counts, semester_data)
+
+        return grade_counts
+
+    def get_course_grades(self, course_code: str) -> Dict[str, GradeCounts]:
+        """Grade counts of every professor who taught ``course_code``.
+
+        One call covers all professors; counts are summed over all semesters
+        like ``get_grades``. Raises if the lookup fails.
+        """
+        response = self._get(GRADES_URL, {"course": course_code}, None)
+        if response.status_code == 400:
+            return {}
+
+        grades_by_professor: Dict[str, GradeCounts] = {}
+        for semester_data in response.json():
+            professor = semester_data.get("professor")
+            if semester_data.get("course") != course_code or not professor:
+                continue
+
+            grade_counts = grades_by_professor.get(professor)
+            if grade_counts is None:
+                grade_counts = grades_by_professor[professor] = _empty_grade_counts()
+            _add_grades(grade_counts, semester_data)
+
+        return grades_by_professor
+
+    def fetch(
+        self,
+        professors: Iterable[str],
+        grade_keys: Iterable[GradeKey],
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[Dict[str, float], Dict[GradeKey, Optional[GradeCounts]]]:
+        """Look up many ratings and ``(professor, course_code)`` grades at once.
+
+        All calls run concurrently, so the batch takes about as long as its
+        slowest call, or until ``deadline``. Returns ``(ratings, grades)``
+        keyed like the inputs; lookups that failed, were short-circuited or
+        did not finish in time are logged and left out.
+        """
+        professors = list(dict.fromkeys(professors))
+        grade_keys = list(dict.fromkeys(grade_keys))
+
+        rating_futures = [
+            self._executor.submit(self.get_professor_rating, professor, deadline)
+            for professor in professors
+        ]
+        grade_futures = [
+            self._executor.submit(self.get_grades, professor, course_code, deadline)
+            for professor, course_code in grade_keys
+        ]
+
+        ratings = _gather(
+            professors,
+            rating_futures,
+            deadline,
+            lambda professor: f"rating for professor {professor}",
+        )
+        grades = _gather(
+            grade_keys,
+            grade_futures,
+            deadline,
+            lambda key: f"grades for {key[0]} in {key[1]}",
+        )
+        return ratings, grades
+
+    def fetch_course_grades(
+        self, course_codes: Iterable[str]
+    ) -> Dict[str, Dict[str, GradeCounts]]:
+        """``get_course_grades`` for many courses at once, keyed by course.
+
+        Courses whose lookup failed are logged and left out.
+        """
+        course_codes = list(dict.fromkeys(course_codes))
+        futures = [
+            self._executor.submit(self.get_course_grades, course_code)
+            for course_code in course_codes
+        ]
+        return _gather(
+            course_codes, futures, None, lambda course_code: f"grades for {course_code}"
+        )
+
+
+def _gather(
+    keys: List[K],
+    futures: List["Future[V]"],
+    deadline: Optional[Deadline],
+    describe: Callable[[K], str],
+) -> Dict[K, V]:
+    """Collect finished lookups by key, waiting no longer than ``deadline``."""
+    results: Dict[K, V] = {}
+    skipped = 0
+    for key, future in zip(keys, futures):
+        try:
+            results[key] = future.result(
+                timeout=deadline.remaining() if deadline is not None else None
+            )
+        except (UpstreamUnavailable, TimeoutError):
+            future.cancel()
+            skipped += 1
+        except Exception as e:
+            print(f"Error fetching {describe(key)}: {e}")
+
+    # One line per batch, not per lookup, while the upstream is unavailable.
+    if skipped:
+        print(f"Skipped {skipped} PlanetTerp lookups: breaker open or out of time")
+    return results
+
+
+def _empty_grade_counts() -> GradeCounts:
+    return {grade: 0 for grade in POSSIBLE_GRADES}
+
+
+def _add_grades(grade_counts: GradeCounts, semester_data: Dict) -> None:
+    for grade in POSSIBLE_GRADES:
+        if grade in semester_data:
+            grade_counts[grade] += semester_data[grade]
@@ -61,6 +61,8 @@ class RuntimeSettings(BaseModel):
     db_keepalives_idle: int = Field(default=30, ge=1, le=3600)
     db_keepalives_interval: int = Field(default=10, ge=1, le=300)
     db_keepalives_count: int = Field(default=5, ge=1, le=20)
+    db_async_enabled: bool = False
+    db_async_pool_max: int = Field(default=20, ge=1, le=100)
 
     api_rate_limit_window_seconds: int = Field(default=60, ge=1, le=3600)
     api_rate_limit_global_per_ip: int = Field(default=400, ge=1, le=5000)
@@ -68,6 +70,20 @@ class RuntimeSettings(BaseModel):
     api_rate_limit_schedules_per_ip: int = Field(default=8, ge=1, le=200)
     api_rate_limit_schedules_burst: int = Field(default=2, ge=0, le=200)
     api_schedule_max_body_bytes: int = Field(default=64_000, ge=1024, le=1_048_576)
+    api_schedule_search_max_nodes: int = Field(default=500_000, ge=1_000, le=50_000_000)
+    api_schedule_search_timeout_ms: int = Field(default=8_000, ge=100, le=120_000)
+    api_schedule_workers: int = Field(default=0, ge=0, le=64)
+    api_schedule_queue_depth: int = Field(default=16, ge=0, le=1_000)
+    api_schedule_cache_size: int = Field(default=512, ge=0, le=100_000)
+    api_schedule_cache_ttl_seconds: int = Field(default=900, ge=1, le=86_400)
+    api_snapshot_refresh_seconds: int = Field(default=60, ge=0, le=86_400)
+    planetterp_timeout_ms: int = Field(default=3_000, ge=100, le=60_000)
+    planetterp_max_concurrency: int = Field(default=8, ge=1, le=64)
+    planetterp_rating_ttl_seconds: int = Field(default=86_400, ge=1, le=31_536_000)
+    planetterp_grades_ttl_seconds: int = Field(default=2_592_000, ge=1, le=31_536_000)
+    planetterp_budget_ms: int = Field(default=4_000, ge=0, le=120_000)
+    planetterp_breaker_failure_threshold: int = Field(default=5, ge=1, le=1_000)
+    planetterp_breaker_reset_seconds: int = Field(default=30, ge=1, le=3_600)
 
     @field_validator("app_env")
     @classmethod
@@ -115,6 +131,11 @@ class RuntimeSettings(BaseModel):
                 "DB_POOL_MAX must be greater than or equal to DB_POOL_MIN."
             )
 
+        if self.db_async_enabled and self.db_async_pool_max < self.db_pool_min:
+            raise ValueError(
+                "DB_ASYNC_POOL_MAX must be greater than or equal to DB_POOL_MIN."
+            )
+
         if self.api_rate_limit_schedules_per_ip > self.api_rate_limit_global_per_ip:
             raise ValueError(
                 "API_RATE_LIMIT_SCHEDULES_PER_IP cannot exceed API_RATE_LIMIT_GLOBAL_PER_IP."
@@ -141,6 +162,8 @@ def _build_settings_payload() -> dict[str, Any]:
             os.getenv("DB_KEEPALIVES_INTERVAL"), default=10
         ),
         "db_keepalives_count": _parse_int(os.getenv("DB_KEEPALIVES_COUNT"), default=5),
+        "db_async_enabled": _parse_bool(os.getenv("DB_ASYNC_ENABLED"), default=False),
+        "db_async_pool_max": _parse_int(os.getenv("DB_ASYNC_POOL_MAX"), default=20),
         "api_rate_limit_window_seconds": _parse_int(
             os.getenv("API_RATE_LIMIT_WINDOW_SECONDS"), default=60
         ),
@@ -159,6 +182,48 @@ def _build_settings_payload() -> dict[str, Any]:
         "api_schedule_max_body_bytes": _parse_int(
             os.getenv("API_SCHEDULE_MAX_BODY_BYTES"), default=64_000
         ),
+        "api_schedule_search_max_nodes": _parse_int(
+            os.getenv("API_SCHEDULE_SEARCH_MAX_NODES"), default=500_000
+        ),
+        "api_schedule_search_timeout_ms": _parse_int(
+            os.getenv("API_SCHEDULE_SEARCH_TIMEOUT_MS"), default=8_000
+        ),
+        "api_schedule_workers": _parse_int(
+            os.getenv("API_SCHEDULE_WORKERS"), default=0
+        ),
+        "api_schedule_queue_depth": _parse_int(
+            os.getenv("API_SCHEDULE_QUEUE_DEPTH"), default=16
+        ),
+        "api_schedule_cache_size": _parse_int(
+            os.getenv("API_SCHEDULE_CACHE_SIZE"), default=512
+        ),
+        "api_schedule_cache_ttl_seconds": _parse_int(
+            os.getenv("API_SCHEDULE_CACHE_TTL_SECONDS"), default=900
+        ),
+        "api_snapshot_refresh_seconds": _parse_int(
+            os.getenv("API_SNAPSHOT_REFRESH_SECONDS"), default=60
+        ),
+        "planetterp_timeout_ms": _parse_int(
+            os.getenv("PLANETTERP_TIMEOUT_MS"), default=3_000
+        ),
+        "planetterp_max_concurrency": _parse_int(
+            os.getenv("PLANETTERP_MAX_CONCURRENCY"), default=8
+        ),
+        "planetterp_rating_ttl_seconds": _parse_int(
+            os.getenv("PLANETTERP_RATING_TTL_SECONDS"), default=86_400
+        ),
+        "planetterp_grades_ttl_seconds": _parse_int(
+            os.getenv("PLANETTERP_GRADES_TTL_SECONDS"), default=2_592_000
+        ),
+        "planetterp_budget_ms": _parse_int(
+            os.getenv("PLANETTERP_BUDGET_MS"), default=4_000
+        ),
+        "planetterp_breaker_failure_threshold": _parse_int(
+            os.getenv("PLANETTERP_BREAKER_FAILURE_THRESHOLD"), default=5
+        ),
+        "planetterp_breaker_reset_seconds": _parse_int(
+            os.getenv("PLANETTERP_BREAKER_RESET_SECONDS"), default=30
+        ),
     }
 
 
@@ -0,0 +1,119 @@
+import time
+from threading import Lock
+from typing import Dict, Optional, Union
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream whose breaker is open or whose
+    deadline has already passed."""
+
+
+class Deadline:
+    """Wall-clock budget shared by every upstream call made for one request."""
+
+    def __init__(self, budget_seconds: float):
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for one call: ``cap``, shortened to what is left of the budget.
+
+        Raises UpstreamUnavailable if nothing is left.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise UpstreamUnavailable("deadline exceeded")
+        return min(cap, remaining)
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker for one upstream service.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``before_call`` fails fast for ``reset_seconds``. It then lets a single
+    probe call through (half-open): success closes it again, failure reopens
+    it for another ``reset_seconds``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, *, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = Lock()
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if now - self._opened_at < self.reset_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def before_call(self) -> None:
+        """Raise UpstreamUnavailable unless a call may go out now."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+        raise UpstreamUnavailable("circuit breaker is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_inconclusive(self) -> None:
+        """Release a call that neither succeeded nor failed, such as one cut
+        short by its caller's deadline."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            now = time.monotonic()
+            if self._probe_in_flight or (
+                self._opened_at is None
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = now
+                self.times_opened += 1
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Union[str, int]]:
+        with self._lock:
+            return {
+                "state": self._state(time.monotonic()),
+                "consecutive_failures": self.consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+            }
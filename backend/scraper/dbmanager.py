@@ -5,15 +5,17 @@ import time
 from pathlib import Path
 
 import psycopg2
-from psycopg2.extras import execute_batch, execute_values
+from psycopg2.extras import Json, execute_batch, execute_values
 
 try:
     from common.db_config import get_db_connect_params
+    from common.meeting_times import meeting_block
 except ModuleNotFoundError:
     backend_root = Path(__file__).resolve().parents[1]
     if str(backend_root) not in sys.path:
         sys.path.append(str(backend_root))
     from common.db_config import get_db_connect_params
+    from common.meeting_times import meeting_block
 
 COURSE_COMMIT_CHUNK_SIZE = 200
 PROGRESS_EVERY = 100
@@ -36,6 +38,18 @@ def _normalize_meeting_tuple(meeting):
     )
 
 
+def _meeting_time_columns(days, start_time, end_time):
+    """(day_mask, start_minute, end_minute) stored alongside a meeting row.
+
+    Meetings without a scheduled time get a zero day mask, so ``day_mask <> 0``
+    selects exactly the blocks the scheduler checks for conflicts.
+    """
+    block = meeting_block(days, start_time, end_time)
+    if block is None:
+        return 0, None, None
+    return block
+
+
 def get_connection():
     """Establishes and returns a connection to the database."""
     return psycopg2.connect(**get_db_connect_params())
@@ -44,6 +58,8 @@ def get_connection():
 def create_tables():
     """Creates the database schema if it doesn't exist."""
     schema_sql = """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
     CREATE TABLE IF NOT EXISTS semesters (
         semester_code VARCHAR(10) PRIMARY KEY,
         name VARCHAR(50) NOT NULL,
@@ -91,6 +107,134 @@ def create_tables():
         class_type VARCHAR(50)
     );
 
+    -- PlanetTerp cache read and refreshed by the API. grade_counts is NULL
+    -- when PlanetTerp has no grades for the pair.
+    CREATE TABLE IF NOT EXISTS planetterp_ratings (
+        professor TEXT PRIMARY KEY,
+        average_rating DOUBLE PRECISION NOT NULL,
+        fetched_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS planetterp_grades (
+        professor TEXT NOT NULL,
+        course_code VARCHAR(20) NOT NULL,
+        grade_counts JSONB,
+        fetched_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (professor, course_code)
+    );
+
+    -- Meeting days as a bitmask (M=1, T=2, W=4, R=8, F=16, S=32, U=64) and
+    -- times as minutes since midnight, parsed at ingest so that day and time
+    -- filters run in SQL. NULL day_mask marks rows not yet backfilled.
+    ALTER TABLE section_meetings
+        ADD COLUMN IF NOT EXISTS day_mask SMALLINT,
+        ADD COLUMN IF NOT EXISTS start_minute SMALLINT,
+        ADD COLUMN IF NOT EXISTS end_minute SMALLINT;
+
+    CREATE INDEX IF NOT EXISTS idx_section_meetings_blocks
+        ON section_meetings(section_id, day_mask, start_minute, end_minute);
+
+    -- One row per section and instructor so that instructor searches and
+    -- professor exclusions are index lookups; instructor_key is the name as
+    -- the API matches it.
+    CREATE TABLE IF NOT EXISTS section_instructors (
+        section_id INTEGER REFERENCES sections(id) ON DELETE CASCADE,
+        instructor TEXT NOT NULL,
+        instructor_key TEXT GENERATED ALWAYS AS (lower(btrim(instructor))) STORED,
+        PRIMARY KEY (section_id, instructor)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_section_instructors_key
+        ON section_instructors(instructor_key);
+
+    CREATE INDEX IF NOT EXISTS idx_section_instructors_key_trgm
+        ON section_instructors USING GIN (instructor_key gin_trgm_ops);
+
+    -- Backfill sections written before section_instructors existed.
+    INSERT INTO section_instructors (section_id, instructor)
+    SELECT DISTINCT s.id, i.name
+    FROM sections s
+    CROSS JOIN LATERAL unnest(s.instructors) AS i(name)
+    WHERE btrim(i.name) <> ''
+      AND NOT EXISTS (
+          SELECT 1 FROM section_instructors si WHERE si.section_id = s.id
+      )
+    ON CONFLICT DO NOTHING;
+
+    -- Section search rows with their meetings pre-aggregated, rebuilt by
+    -- upsert_courses_and_sections after every scrape. day_masks and
+    -- meeting_days hold one entry per meeting for the day filters.
+    CREATE MATERIALIZED VIEW IF NOT EXISTS section_search AS
+    SELECT
+        s.id AS section_id,
+        s.course_code,
+        c.title AS course_title,
+        s.semester_code,
+        s.section_code,
+        s.instructors,
+        s.total_seats,
+        s.open_seats,
+        s.waitlist,
+        COALESCE(
+            json_agg(
+                json_build_object(
+                    'days', sm.days,
+                    'start_time', sm.start_time,
+                    'end_time', sm.end_time,
+                    'building_code', sm.building_code,
+                    'room', sm.room,
+                    'class_type', sm.class_type
+                )
+                ORDER BY sm.id
+            ) FILTER (WHERE sm.id IS NOT NULL),
+            '[]'::json
+        ) AS meetings,
+        COALESCE(
+            array_agg(sm.day_mask ORDER BY sm.id) FILTER (WHERE sm.id IS NOT NULL),
+            '{}'
+        ) AS day_masks,
+        COALESCE(
+            array_agg(sm.days ORDER BY sm.id) FILTER (WHERE sm.days IS NOT NULL),
+            '{}'
+        ) AS meeting_days
+    FROM sections s
+    JOIN courses c ON c.course_code = s.course_code
+    LEFT JOIN section_meetings sm ON sm.section_id = s.id
+    GROUP BY s.id, c.title;
+
+    -- REFRESH ... CONCURRENTLY needs a unique index.
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_section_search_section_id
+        ON section_search(section_id);
+
+    -- Section search pages in byte ("C") order, the order the API's
+    -- snapshot sorts in, so cursors mean the same on both paths.
+    DROP INDEX IF EXISTS idx_section_search_semester_order;
+    CREATE INDEX IF NOT EXISTS idx_section_search_semester_order_c
+        ON section_search(
+            semester_code, course_code COLLATE "C", section_code COLLATE "C"
+        );
+
+    -- Course search: weighted full-text vector (kept current by Postgres) and
+    -- trigram indexes for typo-tolerant and substring matches.
+    ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(course_code, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(title, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED;
+
+    CREATE INDEX IF NOT EXISTS idx_courses_search_vector
+        ON courses USING GIN (search_vector);
+
+    CREATE INDEX IF NOT EXISTS idx_courses_title_trgm
+        ON courses USING GIN (title gin_trgm_ops);
+
+    CREATE INDEX IF NOT EXISTS idx_courses_description_trgm
+        ON courses USING GIN (description gin_trgm_ops);
+
+    CREATE INDEX IF NOT EXISTS idx_sections_semester_last_updated
+        ON sections(semester_code, last_updated);
+
     CREATE INDEX IF NOT EXISTS idx_section_meetings_section_id
         ON section_meetings(section_id);
 
@@ -109,6 +253,31 @@ def create_tables():
     with get_connection() as conn:
         with conn.cursor() as cursor:
             cursor.execute(schema_sql)
+
+            cursor.execute(
+                """
+                SELECT id, days, start_time, end_time
+                FROM section_meetings
+                WHERE day_mask IS NULL;
+                """
+            )
+            backfill = [
+                (*_meeting_time_columns(days, start_time, end_time), meeting_id)
+                for meeting_id, days, start_time, end_time in cursor.fetchall()
+            ]
+            if backfill:
+                execute_batch(
+                    cursor,
+                    """
+                    UPDATE section_meetings
+                    SET day_mask = %s, start_minute = %s, end_minute = %s
+                    WHERE id = %s;
+                    """,
+                    backfill,
+                    page_size=500,
+                )
+                print(f"Backfilled meeting times for {len(backfill)} meetings.")
+
             print("Database tables verified/created successfully.")
 
 
@@ -150,6 +319,9 @@ def upsert_courses_and_sections(all_course_info, curr_sem_code):
     total_courses = len(all_course_info)
     start_time = time.time()
 
+    # last_updated versions the API's caches, so it only moves when a row
+    # actually changes. Unchanged sections are still updated so RETURNING
+    # yields every id; changed meetings and instructors bump it below.
     course_upsert_sql = """
         INSERT INTO courses (
             course_code, department_code, title, credits,
@@ -160,7 +332,14 @@ def upsert_courses_and_sections(all_course_info, curr_sem_code):
             credits = EXCLUDED.credits,
             description = EXCLUDED.description,
             attributes = EXCLUDED.attributes,
-            last_updated = CURRENT_TIMESTAMP;
+            last_updated = CURRENT_TIMESTAMP
+        WHERE (
+            courses.title, courses.credits,
+            courses.description, courses.attributes
+        ) IS DISTINCT FROM (
+            EXCLUDED.title, EXCLUDED.credits,
+            EXCLUDED.description, EXCLUDED.attributes
+        );
     """
 
     section_upsert_sql = """
@@ -173,15 +352,32 @@ def upsert_courses_and_sections(all_course_info, curr_sem_code):
             total_seats = EXCLUDED.total_seats,
             open_seats = EXCLUDED.open_seats,
             waitlist = EXCLUDED.waitlist,
-            last_updated = CURRENT_TIMESTAMP
+            last_updated = CASE
+                WHEN (
+                    sections.instructors, sections.total_seats,
+                    sections.open_seats, sections.waitlist
+                ) IS DISTINCT FROM (
+                    EXCLUDED.instructors, EXCLUDED.total_seats,
+                    EXCLUDED.open_seats, EXCLUDED.waitlist
+                )
+                THEN CURRENT_TIMESTAMP
+                ELSE sections.last_updated
+            END
         RETURNING id, course_code, section_code;
     """
 
     insert_meetings_sql = """
         INSERT INTO section_meetings (
             section_id, days, start_time, end_time,
-            building_code, room, class_type
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+            building_code, room, class_type,
+            day_mask, start_minute, end_minute
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT DO NOTHING;
+    """
+
+    insert_instructors_sql = """
+        INSERT INTO section_instructors (section_id, instructor)
+        VALUES %s
         ON CONFLICT DO NOTHING;
     """
 
@@ -201,6 +397,7 @@ def upsert_courses_and_sections(all_course_info, curr_sem_code):
                 course_batch = []
                 section_batch = []
                 meetings_by_section_key = {}
+                instructors_by_section_key = {}
 
                 for course in course_chunk:
                     match = DEPT_CODE_RE.match(course["course_code"])
@@ -241,6 +438,11 @@ def upsert_courses_and_sections(all_course_info, curr_sem_code):
                             ]
                         )
                         meetings_by_section_key[section_key] = normalized_meetings
+                        instructors_by_section_key[section_key] = {
+                            name
+                            for name in section.get("instructors", [])
+                            if name and name.strip()
+                        }
 
                 if course_batch:
                     execute_batch(
@@ -309,7 +511,13 @@ def upsert_courses_and_sections(all_course_info, curr_sem_code):
 
                         changed_section_ids.append(section_id)
                         for meeting in new_meetings:
-                            meetings_to_insert.append((section_id, *meeting))
+                            meetings_to_insert.append(
+                                (
+                                    section_id,
+                                    *meeting,
+                                    *_meeting_time_columns(*meeting[:3]),
+                                )
+                            )
 
                 if changed_section_ids:
                     cursor.execute(
@@ -325,6 +533,62 @@ def upsert_courses_and_sections(all_course_info, curr_sem_code):
                         page_size=500,
                     )
 
+                changed_instructor_ids = []
+                instructors_to_insert = []
+
+                if section_id_map:
+                    cursor.execute(
+                        """
+                        SELECT section_id, instructor
+                        FROM section_instructors
+                        WHERE section_id = ANY(%s);
+                        """,
+                        (list(section_id_map.values()),),
+                    )
+
+                    existing_instructors = {}
+                    for section_id, instructor in cursor.fetchall():
+                        existing_instructors.setdefault(section_id, set()).add(
+                            instructor
+                        )
+
+                    for section_key, names in instructors_by_section_key.items():
+                        section_id = section_id_map.get(section_key)
+                        if not section_id:
+                            continue
+                        if existing_instructors.get(section_id, set()) == names:
+                            continue
+
+                        changed_instructor_ids.append(section_id)
+                        for name in sorted(names):
+                            instructors_to_insert.append((section_id, name))
+
+                if changed_instructor_ids:
+                    cursor.execute(
+                        "DELETE FROM section_instructors WHERE section_id = ANY(%s)",
+                        (changed_instructor_ids,),
+                    )
+
+                if instructors_to_insert:
+                    execute_values(
+                        cursor,
+                        insert_instructors_sql,
+                        instructors_to_insert,
+                        page_size=500,
+                    )
+
+                touched_section_ids = sorted(
+                    set(changed_section_ids) | set(changed_instructor_ids)
+                )
+                if touched_section_ids:
+                    cursor.execute(
+                        """
+                        UPDATE sections SET last_updated = CURRENT_TIMESTAMP
+                        WHERE id = ANY(%s);
+                        """,
+                        (touched_section_ids,),
+                    )
+
                 conn.commit()
 
                 processed_courses += len(course_chunk)
@@ -345,8 +609,82 @@ def upsert_courses_and_sections(all_course_info, curr_sem_code):
                         f"elapsed: {elapsed:.1f}s"
                     )
 
+            # Readers keep using the previous contents while this runs.
+            cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY section_search;")
+            conn.commit()
+
             total_elapsed = time.time() - start_time
             print(
                 f"Successfully processed {total_courses} courses into the database "
                 f"in {total_elapsed:.2f} seconds."
             )
+
+
+def get_fresh_planetterp_keys(max_age_seconds):
+    """Professors and (professor, course) pairs fetched within max_age_seconds"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT professor FROM planetterp_ratings
+                WHERE fetched_at >= CURRENT_TIMESTAMP - make_interval(secs => %s);
+            """,
+                (max_age_seconds,),
+            )
+            professors = {row[0] for row in cursor.fetchall()}
+
+            cursor.execute(
+                """
+                SELECT professor, course_code FROM planetterp_grades
+                WHERE fetched_at >= CURRENT_TIMESTAMP - make_interval(secs => %s);
+            """,
+                (max_age_seconds,),
+            )
+            grade_keys = {(row[0], row[1]) for row in cursor.fetchall()}
+
+    return professors, grade_keys
+
+
+def upsert_planetterp_data(ratings, grades):
+    """Stores PlanetTerp ratings and per (professor, course) grade counts"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO planetterp_ratings (professor, average_rating)
+                VALUES %s
+                ON CONFLICT (professor) DO UPDATE SET
+                    average_rating = EXCLUDED.average_rating,
+                    fetched_at = CURRENT_TIMESTAMP;
+            """,
+                sorted(ratings.items()),
+                page_size=500,
+            )
+            execute_values(
+                cursor,
+                """
+                INSERT INTO planetterp_grades (professor, course_code, grade_counts)
+                VALUES %s
+                ON CONFLICT (professor, course_code) DO UPDATE SET
+                    grade_counts = EXCLUDED.grade_counts,
+                    fetched_at = CURRENT_TIMESTAMP;
+            """,
+                [
+                    (
+                        professor,
+                        course_code,
+                        Json(counts) if counts is not None else None,
+                    )
+                    for (professor, course_code), counts in sorted(
+                        grades.items(), key=lambda item: item[0]
+                    )
+                ],
+                page_size=500,
+            )
+        conn.commit()
+
+    print(
+        f"Stored {len(ratings)} PlanetTerp ratings and "
+        f"{len(grades)} grade distributions."
+    )
@@ -5,6 +5,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import dbmanager
 import requests
 from bs4 import BeautifulSoup
+from common.planetterp import PlanetTerpClient
 from requests.adapters import HTTPAdapter
 
 TESTUDO_HOME_URL = "https://app.testudo.umd.edu/soc/"
@@ -14,6 +15,10 @@ TESTUDO_SPEC_COURSE_URL = "https://app.testudo.umd.edu/soc/search?courseId={cour
 REQUEST_TIMEOUT_SECONDS = 20
 
 MAX_WORKERS = 25
+# PlanetTerp is a community-run API, so keep the fan-out modest and only
+# refetch entries older than a day even though the scraper runs hourly.
+PLANETTERP_MAX_WORKERS = 8
+PLANETTERP_REFRESH_SECONDS = 24 * 60 * 60
 
 _thread_local = threading.local()
 
@@ -321,6 +326,47 @@ def scrape_available_course_codes_for_dept(dept_code, dept_name, curr_sem_code):
     return sorted(list(all_dept_course_codes))
 
 
+def scrape_planetterp_data(all_course_info):
+    """Fetch ratings and grade counts for every instructor teaching this semester.
+
+    Grades come from one call per course covering all of its professors, so the
+    API never has to query PlanetTerp per professor-course pair. Entries fetched
+    within PLANETTERP_REFRESH_SECONDS are skipped.
+    """
+    grade_keys = {
+        (instructor, course_info["course_code"])
+        for course_info in all_course_info
+        for section in course_info.get("sections", [])
+        for instructor in section.get("instructors", [])
+        if instructor
+    }
+    fresh_professors, fresh_keys = dbmanager.get_fresh_planetterp_keys(
+        PLANETTERP_REFRESH_SECONDS
+    )
+    professors = {professor for professor, _ in grade_keys} - fresh_professors
+    course_codes = {course_code for _, course_code in grade_keys - fresh_keys}
+    print(
+        f"Fetching PlanetTerp ratings for {len(professors)} professors "
+        f"and grades for {len(course_codes)} courses"
+    )
+
+    client = PlanetTerpClient(
+        timeout_seconds=REQUEST_TIMEOUT_SECONDS,
+        max_concurrency=PLANETTERP_MAX_WORKERS,
+    )
+    ratings, _ = client.fetch(professors, [])
+    grades_by_course = client.fetch_course_grades(course_codes)
+
+    # Professors missing from a course's grades have no data for it, the same
+    # as a 400 from a per-pair lookup.
+    grades = {
+        (professor, course_code): grades_by_course[course_code].get(professor)
+        for professor, course_code in grade_keys
+        if course_code in grades_by_course
+    }
+    return ratings, grades
+
+
 if __name__ == "__main__":
     start_time = time.time()
     available_depts, curr_sem_code = (
@@ -342,5 +388,9 @@ if __name__ == "__main__":
     dbmanager.upsert_courses_and_sections(scraped_course_info, curr_sem_code)
     print("Database sync complete!")
 
+    print("Syncing PlanetTerp data...")
+    prof_ratings, prof_grades = scrape_planetterp_data(scraped_course_info)
+    dbmanager.upsert_planetterp_data(prof_ratings, prof_grades)
+
     end_time = time.time()
     print(f"Scraping completed in {end_time - start_time:.2f} seconds")
@@ -124,17 +124,23 @@ export function createDataClient(memoryCache, options = {}) {
         safeWriteCache(catalogCacheKey, normalizedCatalog);
     }
 
-    /** @param {number} offset @param {number} [pageSize] */
-    async function loadCoursesPage(offset, pageSize = COURSE_PAGE_SIZE) {
+    /** @param {string | null} cursor @param {number} [pageSize] */
+    async function loadCoursesPage(cursor, pageSize = COURSE_PAGE_SIZE) {
+        const params = new URLSearchParams({ limit: String(pageSize) });
+        if (cursor) params.set("cursor", cursor);
+
         const response = await fetch(
-            `${backendBaseUrl}/api/v1/courses?limit=${pageSize}&offset=${offset}`,
+            `${backendBaseUrl}/api/v1/courses?${params.toString()}`,
         );
 
         if (!response.ok) {
             throw new Error(`Failed to load courses (status ${response.status})`);
         }
 
-        return response.json();
+        return {
+            courses: await response.json(),
+            nextCursor: response.headers.get("X-Next-Cursor"),
+        };
     }
 
     /** @param {string} professorName */